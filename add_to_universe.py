@@ -15,7 +15,8 @@ import argparse
 from typing import Dict, Optional, List
 
 import pandas as pd
-import requests
+
+import sec_client
 
 SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 CACHE_PATH = "data/cache/sec_company_tickers.json"
@@ -127,7 +128,7 @@ def pad_cik(cik: str) -> str:
         return cik
 
 
-def load_sec_ticker_map(user_agent: str) -> Dict[str, str]:
+def load_sec_ticker_map() -> Dict[str, str]:
     """
     Returns mapping: TICKER -> 10-digit zero-padded CIK as string
     Uses cache if available.
@@ -141,19 +142,11 @@ def load_sec_ticker_map(user_agent: str) -> Dict[str, str]:
         except Exception:
             pass
 
-    if not user_agent or "example.com" in user_agent:
+    if not sec_client.USER_AGENT or "example.com" in sec_client.USER_AGENT:
         print("WARNING: SEC_USER_AGENT not set or still default. Set it for reliable SEC access.")
         print('Example: set SEC_USER_AGENT="your-app/0.1 (email: you@domain.com)"')
 
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": user_agent,
-        "Accept": "application/json,text/plain,*/*",
-        "Accept-Encoding": "gzip, deflate",
-    })
-    r = s.get(SEC_TICKERS_URL, timeout=60)
-    r.raise_for_status()
-    raw = r.json()
+    raw = sec_client.get_json(SEC_TICKERS_URL)
 
     # raw is dict keyed by integers as strings: {"0": {...}, "1": {...}}
     mp: Dict[str, str] = {}
@@ -219,10 +212,9 @@ def main():
     existing = set(df["ticker"].astype(str).apply(norm_ticker).tolist())
 
     sec_map = {}
-    user_agent = os.getenv("SEC_USER_AGENT", "lia-biopharma/0.1 (contact: you@example.com)")
     if not args.no_sec_lookup:
         try:
-            sec_map = load_sec_ticker_map(user_agent=user_agent)
+            sec_map = load_sec_ticker_map()
         except Exception as e:
             print(f"SEC lookup failed ({type(e).__name__}): {e}")
             print("Continuing without SEC lookup; will prompt for CIK.")
@@ -3,6 +3,8 @@ import os, json
 import pandas as pd
 from datetime import datetime, timezone
 
+import mention_cube
+
 RANKED = "out/ranked_watchlist.csv"
 CAL    = "out/catalyst_calendar.csv"
 EVENTS = "out/sec_events_consolidated_with_accession.csv"  # for CRL/HOLD breaking
@@ -78,6 +80,12 @@ def main():
 
     ranked["days_to_event"] = ranked["days_to_event"].fillna(9999)
 
+    # Mention counts as of now, from the hourly mention cube (ranked_watchlist.csv may be older)
+    if mention_cube.available() and "ticker" in ranked.columns:
+        counts = mention_cube.counts({"mentions_24h": 24, "mentions_7d": 24 * 7}).set_index("ticker")
+        for c in ["mentions_24h", "mentions_7d"]:
+            ranked[c] = ranked["ticker"].astype(str).str.upper().map(counts[c]).fillna(0)
+
     # ---- Breaking alerts from SEC (CRL / HOLD) ----
     breaking_lines = []
     try:
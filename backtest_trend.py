@@ -0,0 +1,269 @@
+# backtest_trend.py — Replay archived mentions and emit trend_score per ticker per tick
+#
+# Walks a tick grid (default every 15 minutes) over a mentions archive (the mentions store, or
+# any mentions CSV via --mentions) and computes trend_v2's trend_score for every ticker with a
+# mention in the trailing LOOKBACK_DAYS at each tick, once per parameter set:
+#
+#   python backtest_trend.py --start 2026-07-01 --end 2026-10-01 [--tick 15]
+#       [--params sets.json] [--half-life 6,12,24] [--tickers ABCD,EFGH] [--mentions PATH]
+#
+# sets.json is a list of {"name": ..., "half_life_hours": ..., "intent_weights": {...},
+# "domain_weights": {...}}; weights given there are laid over trend_v2's, the rest are kept.
+#
+# A mention counts from its created_at_utc on (the archive has no arrival time) and undated
+# mentions are skipped. Ticks use trend_v2's exact windows (6h, previous 6h, 24h, LOOKBACK_DAYS),
+# so a tick's scores are what `trend_v2.py --full` would have written at that instant, to the
+# millisecond.
+#
+# Titles, domains and intents are parsed once. Mention counts, sources_24h and the window edges
+# of every (ticker, tick) do not depend on the parameters and are found once, by binary search
+# over the mentions sorted by ticker and time. A parameter set then costs one per-ticker
+# cumulative sum of decayed scores (re-anchored every MAX_EXP half-lives so 2**x stays finite)
+# and a lookup per window edge, instead of a rescore per tick.
+#
+# Output: out/backtest_trend.csv
+
+import os, json, time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import mentions_store
+import trend_v2
+
+OUT_BACKTEST = "out/backtest_trend.csv"
+TICK_MINUTES = float(os.getenv("BACKTEST_TICK_MINUTES", "15"))
+# half-lives of ticks sharing one cumulative sum; terms it lets underflow (2**-1000 at the block's
+# end) are below 2**-600 of a mention's weight at every tick of the block
+MAX_EXP = 400.0
+
+MS_PER_HOUR = 3_600_000
+EPOCH = pd.Timestamp("1970-01-01", tz="UTC")
+
+OUT_COLS = [
+    "param_set", "tick_utc", "ticker", "trend_score", "velocity_6h", "accel_6h",
+    "mentions_6h", "mentions_24h", "mentions_7d", "sources_24h",
+]
+
+
+def to_ms(ts) -> np.ndarray:
+    return np.asarray((pd.Series(ts) - EPOCH) // pd.Timedelta(milliseconds=1), dtype=np.int64)
+
+
+def utc(s: str) -> pd.Timestamp:
+    t = pd.Timestamp(s)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+
+def load_mentions(path: str, start, end, tickers: set):
+    """Dated mentions in [start - LOOKBACK_DAYS, end], prepared and weighted by trend_v2."""
+    lookback = pd.Timedelta(days=trend_v2.LOOKBACK_DAYS)
+    if path:
+        df = trend_v2.safe_read_mentions(path)
+    else:
+        df = mentions_store.read(
+            start=None if start is None else start - lookback,
+            end=None if end is None else end + pd.Timedelta(days=1),
+        )
+    if df.empty:
+        return df, None
+
+    df = trend_v2.prepare_mentions(df, EPOCH if start is None else start - lookback)
+    keep = df["ts"].notna()
+    if end is not None:
+        keep &= df["ts"].le(end)
+    if tickers:
+        keep &= df["ticker"].isin(tickers)
+    df = df[keep].reset_index(drop=True)
+    if df.empty:
+        return df, None
+    hits = trend_v2.add_weights(df)
+    return df, hits
+
+
+def covered(group: np.ndarray, ms: np.ndarray, t0: int, dt: int, nt: int, window_ms: int):
+    """
+    Tick index ranges [k0, k1] where a group (sorted, ms sorted within it) has a row with
+    t - window_ms <= ms <= t; overlapping and adjacent ranges are merged. Returns group, k0, k1.
+    """
+    k0 = np.maximum(-((t0 - ms) // dt), 0)
+    k1 = np.minimum((ms + window_ms - t0) // dt, nt - 1)
+    ok = k0 <= k1
+    group, k0, k1 = group[ok], k0[ok], k1[ok]
+    if not len(group):
+        return group, k0, k1
+    # ms is sorted within a group, so k1 never decreases there: compare with the previous row only
+    new = np.ones(len(group), dtype=bool)
+    new[1:] = (group[1:] != group[:-1]) | (k0[1:] > k1[:-1] + 1)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:] - 1, len(group) - 1)
+    return group[first], k0[first], k1[last]
+
+
+def expand(group: np.ndarray, k0: np.ndarray, k1: np.ndarray):
+    """Every (group, tick index) in the ranges from covered()."""
+    n = k1 - k0 + 1
+    offs = np.repeat(np.cumsum(n) - n, n)
+    return np.repeat(group, n), np.repeat(k0, n) + (np.arange(n.sum()) - offs)
+
+
+class Replay:
+    """The parameter-free part of a backtest: sorted mentions, the tick grid and window edges."""
+
+    def __init__(self, df: pd.DataFrame, hits: pd.DataFrame, start, end, tick_minutes: float):
+        dt = int(round(tick_minutes * 60_000))
+        ms_all = to_ms(df["ts"])
+        # ticks on whole multiples of dt: inside [start, end], or around the mentions by default
+        self.t0 = (ms_all.min() // dt) * dt if start is None else -(-to_ms([start])[0] // dt) * dt
+        last = -(-ms_all.max() // dt) * dt if end is None else (to_ms([end])[0] // dt) * dt
+        self.nt = int(max((last - self.t0) // dt + 1, 0))
+        self.dt = dt
+        # formatted once: writing datetimes is most of the cost of a large output
+        ticks = pd.to_datetime(self.t0 + np.arange(self.nt, dtype=np.int64) * dt, unit="ms", utc=True)
+        self.tick_labels = np.asarray(ticks.strftime("%Y-%m-%dT%H:%M:%SZ"), dtype=object)
+
+        codes, self.tickers = pd.factorize(df["ticker"], sort=True)
+        order = np.lexsort((ms_all, codes))
+        self.code = codes[order].astype(np.int64)
+        self.ms = ms_all[order]
+        self.domain = df["domain"].to_numpy()[order]
+        self.hits = hits.iloc[order].reset_index(drop=True)
+        self.ticker_first = np.searchsorted(self.code, np.arange(len(self.tickers)), side="left")
+
+        w7 = 24 * trend_v2.LOOKBACK_DAYS * MS_PER_HOUR
+        base = self.t0 - w7 - 1
+        span = max(int(self.ms.max()), self.t0 + (self.nt - 1) * dt) - base + 1
+        keys = self.code * span + (self.ms - base)
+
+        # (ticker, tick) pairs with at least one mention in the lookback window
+        g, k0, k1 = covered(self.code, self.ms, self.t0, dt, self.nt, w7)
+        self.pair_code, self.pair_k = expand(g, k0, k1)
+        self.pair_t = self.t0 + self.pair_k * dt
+        pk = self.pair_code * span + (self.pair_t - base)
+
+        edge = lambda hours: np.searchsorted(keys, pk - hours * MS_PER_HOUR, side="left")
+        self.hi = np.searchsorted(keys, pk, side="right")
+        self.lo6, self.lo12, self.lo24 = edge(6), edge(12), edge(24)
+        self.lo7d = edge(24 * trend_v2.LOOKBACK_DAYS)
+
+        # sources_24h: distinct domains per ticker within 24h = (ticker, domain) ranges covering the tick
+        dcode = pd.factorize(self.domain)[0]
+        o = np.lexsort((self.ms, dcode, self.code))
+        pair = self.code[o] * (dcode.max() + 1) + dcode[o]
+        g, k0, k1 = covered(pair, self.ms[o], self.t0, dt, self.nt, 24 * MS_PER_HOUR)
+        tcode = g // (dcode.max() + 1)
+        starts = np.sort(tcode * self.nt + k0)
+        ends = np.sort(tcode * self.nt + k1)
+        q = self.pair_code * self.nt + self.pair_k
+        self.sources_24h = np.searchsorted(starts, q, side="right") - np.searchsorted(ends, q, side="left")
+
+    def run(self, p: dict) -> pd.DataFrame:
+        """trend_v2 columns for every (ticker, tick) pair under parameter set p."""
+        src_w = trend_v2.per_unique(
+            pd.Series(self.domain, dtype=object),
+            lambda d: trend_v2.domain_weight_series(d, p["domain_weights"]),
+        ).to_numpy(dtype=float)
+        w = src_w * trend_v2.intent_weight(self.hits, p["intent_weights"])
+
+        hl_ms = p["half_life_hours"] * MS_PER_HOUR
+        block = max(1, int(MAX_EXP * hl_ms // self.dt))
+        sums = {c: np.zeros(len(self.pair_k)) for c in ("s6", "sprev6", "s24", "s7d")}
+        first = self.ticker_first[self.pair_code]
+        for kb in range(0, self.nt, block):
+            sel = np.flatnonzero((self.pair_k >= kb) & (self.pair_k < kb + block))
+            if not len(sel):
+                continue
+            anchor = self.t0 + (min(kb + block, self.nt) - 1) * self.dt
+            x = w * np.exp2(np.minimum(self.ms - anchor, 0) / hl_ms)
+            # cum[i] = sum of the ticker's x before row i (within-ticker, so no cross-ticker cancellation)
+            cum = np.concatenate([[0.0], pd.Series(x).groupby(self.code).cumsum().to_numpy()])
+            f = lambda idx: np.where(idx > first[sel], cum[idx], 0.0)
+            scale = np.exp2((anchor - self.pair_t[sel]) / hl_ms)
+            hi, lo6, lo12 = f(self.hi[sel]), f(self.lo6[sel]), f(self.lo12[sel])
+            sums["s6"][sel] = (hi - lo6) * scale
+            sums["sprev6"][sel] = (lo6 - lo12) * scale
+            sums["s24"][sel] = (hi - f(self.lo24[sel])) * scale
+            sums["s7d"][sel] = (hi - f(self.lo7d[sel])) * scale
+
+        agg = pd.DataFrame({
+            "param_set": p["name"],
+            "tick_utc": self.tick_labels[self.pair_k],
+            "ticker": self.tickers.to_numpy()[self.pair_code],
+            "mentions_6h": self.hi - self.lo6,
+            "mentions_prev6h": self.lo6 - self.lo12,
+            "mentions_24h": self.hi - self.lo24,
+            "mentions_7d": self.hi - self.lo7d,
+            "score_6h": sums["s6"],
+            "score_prev6h": sums["sprev6"],
+            "score_24h": sums["s24"],
+            "score_7d": sums["s7d"],
+            "sources_24h": self.sources_24h,
+        })
+        return trend_v2.add_trend_score(agg)[OUT_COLS]
+
+
+def param_sets(path: str, half_lives: str) -> list:
+    sets = []
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            sets = json.load(f)
+    for h in [float(x) for x in (half_lives or "").split(",") if x.strip()]:
+        sets.append({"name": f"hl{h:g}", "half_life_hours": h})
+    if not sets:
+        sets = [{"name": "current"}]
+    out = []
+    for i, p in enumerate(sets):
+        out.append({
+            "name": str(p.get("name") or f"set{i + 1}"),
+            "half_life_hours": float(p.get("half_life_hours", trend_v2.HALF_LIFE_HOURS)),
+            "intent_weights": {**trend_v2.INTENT_WEIGHTS, **p.get("intent_weights", {})},
+            "domain_weights": {**trend_v2.DOMAIN_WEIGHTS, **p.get("domain_weights", {})},
+        })
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay archived mentions -> per-tick trend_score per ticker")
+    ap.add_argument("--start", default="", help="first tick (UTC date/time; default: first mention)")
+    ap.add_argument("--end", default="", help="last tick (UTC date/time; default: last mention)")
+    ap.add_argument("--tick", type=float, default=TICK_MINUTES, help="minutes between ticks")
+    ap.add_argument("--params", default="", help="JSON list of parameter sets")
+    ap.add_argument("--half-life", default="", help="comma-separated HALF_LIFE_HOURS values to sweep")
+    ap.add_argument("--tickers", default="", help="comma-separated tickers (default: all)")
+    ap.add_argument("--mentions", default="", help="mentions CSV instead of the mentions store")
+    ap.add_argument("--out", default=OUT_BACKTEST)
+    args = ap.parse_args(argv)
+
+    start = utc(args.start) if args.start else None
+    end = utc(args.end) if args.end else None
+    tickers = {t.strip().upper() for t in args.tickers.split(",") if t.strip()}
+    sets = param_sets(args.params, args.half_life)
+
+    t = time.perf_counter()
+    df, hits = load_mentions(args.mentions, start, end, tickers)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    if df.empty:
+        pd.DataFrame(columns=OUT_COLS).to_csv(args.out, index=False)
+        print(f"No dated mentions in range -> wrote empty {args.out}")
+        return
+
+    rp = Replay(df, hits, start, end, args.tick)
+    print(
+        f"{len(df)} mentions, {len(rp.tickers)} tickers, {rp.nt} ticks of {args.tick:g}m, "
+        f"{len(rp.pair_k)} ticker-ticks; prepared in {time.perf_counter() - t:.2f}s"
+    )
+
+    rows = 0
+    for i, p in enumerate(sets):
+        t = time.perf_counter()
+        out = rp.run(p)
+        out.to_csv(args.out, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        rows += len(out)
+        print(f"  {p['name']}: half_life={p['half_life_hours']:g}h {time.perf_counter() - t:.2f}s")
+
+    print(f"Wrote {args.out} ({rows} rows, {len(sets)} parameter sets)")
+
+
+if __name__ == "__main__":
+    main()
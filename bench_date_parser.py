@@ -0,0 +1,139 @@
+# bench_date_parser.py — Parity + speed check for the calendar's exact-date parser
+#
+# Builds a corpus of date strings in the four DATE_PATTERNS_EXACT shapes (a generated grid of
+# edge cases: every month spelling, day 0-99, 2/3/4-digit years around the century pivot,
+# leap days, D/M and Y/M/D readings) plus every exact-date token found in the cached
+# filings, then checks that the fast parse_exact_date agrees with the old pd.to_datetime
+# parser on every string and prints timings. The memo timing replays as many strings as the
+# parse_exact_date cache holds, so every call in it is a hit.
+#
+#   python bench_date_parser.py [--limit N] [--no-filings]
+#
+# Strings pandas turns into a Timestamp that has no datetime.date (year 0, e.g. "0000-01-01")
+# used to crash the calendar; the fast parser returns None for them and they count as agreeing.
+
+import time
+import argparse
+from datetime import date
+from typing import Optional
+import pandas as pd
+
+import filing_cache
+import filing_docs
+import extract_catalyst_calendar_from_txt as cal
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+MONTH_SPELLINGS = []
+for _name in MONTH_NAMES:
+    for _m in dict.fromkeys([_name, _name[:3]]):
+        MONTH_SPELLINGS.extend([_m, _m.upper(), _m.lower()])
+
+YEARS4 = ["0000", "0001", "0004", "0025", "0050", "0075", "0076", "0077", "0099", "0100",
+          "1000", "1677", "1900", "1999", "2000", "2024", "2025", "2026", "2027", "2100",
+          "2262", "2263", "9999"]
+YEARS_SLASH = ["00", "09", "26", "31", "32", "68", "69", "75", "76", "77", "99",
+               "000", "001", "031", "099", "202"] + YEARS4
+
+
+def grid_corpus():
+    out = []
+    days = [str(d) for d in range(0, 100)] + ["00", "01", "05", "09"]
+    for mon in MONTH_SPELLINGS:
+        for d, y in [("15", "2026"), ("29", "2024"), ("31", "0031"), ("45", "0012"), ("0", "2026")]:
+            out.append(f"{mon} {d}, {y}")
+            out.append(f"{d} {mon} {y}")
+    for mon in MONTH_NAMES:
+        for d in days:
+            for y in YEARS4 + ["0012", "0031", "0032"]:
+                out.append(f"{mon} {d}, {y}")
+                out.append(f"{d} {mon} {y}")
+    for y in YEARS4:
+        for m in range(0, 14):
+            for d in range(0, 33):
+                out.append(f"{y}-{m:02d}-{d:02d}")
+    nums = [str(n) for n in range(0, 100)] + ["00", "01", "02", "09", "12"]
+    for a in nums:
+        for b in ["0", "1", "2", "9", "11", "12", "13", "29", "31", "32", "45", "01", "02"]:
+            for y in YEARS_SLASH:
+                out.append(f"{a}/{b}/{y}")
+                out.append(f"{b}/{a}/{y}")
+    return out
+
+
+def filing_corpus(limit: int = 0):
+    out = set()
+    entries = filing_cache.entries()
+    if limit:
+        entries = entries[:limit]
+    for e in entries:
+        _, docs = filing_docs.get_documents(e["cik"], e["accession"])
+        for _, tx in cal.select_candidate_docs(docs):
+            for pat in cal.DATE_PATTERNS_EXACT:
+                out.update(m.group(0) for m in pat.finditer(tx))
+    return sorted(out)
+
+
+def parse_exact_date_pandas(ds: str) -> Optional[date]:
+    # Reference implementation (the calendar's old parser)
+    dt = pd.to_datetime(ds, errors="coerce")
+    return dt.date() if pd.notna(dt) else None
+
+
+def reference(ds: str):
+    try:
+        return parse_exact_date_pandas(ds)
+    except (NotImplementedError, ValueError, OverflowError):
+        return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Check the fast exact-date parser against pd.to_datetime")
+    ap.add_argument("--limit", type=int, default=0, help="only the first N cached filings (0 = all)")
+    ap.add_argument("--no-filings", action="store_true", help="only the generated grid")
+    args = ap.parse_args(argv)
+
+    corpus = grid_corpus()
+    n_grid = len(corpus)
+    if not args.no_filings:
+        corpus += filing_corpus(args.limit)
+    for ds in corpus:  # every string must be a whole DATE_PATTERNS_EXACT token
+        assert any(pat.fullmatch(ds) for pat in cal.DATE_PATTERNS_EXACT), ds
+    print(f"{len(corpus)} date strings ({n_grid} generated, {len(corpus) - n_grid} from filings)")
+
+    t0 = time.perf_counter()
+    ref = [reference(ds) for ds in corpus]
+    t_ref = time.perf_counter() - t0
+
+    cal.parse_exact_date.cache_clear()
+    t0 = time.perf_counter()
+    fast = [cal.parse_exact_date(ds) for ds in corpus]
+    t_fast = time.perf_counter() - t0
+
+    # The cold pass evicted the start of corpora larger than the cache, so warm a
+    # cache-sized slice first and time the replay of that slice.
+    memo = corpus[:cal.parse_exact_date.cache_info().maxsize]
+    cal.parse_exact_date.cache_clear()
+    for ds in memo:
+        cal.parse_exact_date(ds)
+    hits = cal.parse_exact_date.cache_info().hits
+    t0 = time.perf_counter()
+    for ds in memo:
+        cal.parse_exact_date(ds)
+    t_memo = time.perf_counter() - t0
+    assert cal.parse_exact_date.cache_info().hits - hits == len(memo), "memo pass missed the cache"
+
+    bad = [(ds, r, f) for ds, r, f in zip(corpus, ref, fast) if r != f]
+    n = len(corpus)
+    print(f"pd.to_datetime : {t_ref:.3f}s  {n / t_ref:,.0f}/s")
+    print(f"fast (cold)    : {t_fast:.3f}s  {n / t_fast:,.0f}/s  ({t_ref / t_fast:.0f}x)")
+    print(f"fast (memo)    : {t_memo:.3f}s  {len(memo) / t_memo:,.0f}/s  ({len(memo)} strings)")
+    print(f"parsed={sum(r is not None for r in ref)} mismatches={len(bad)}")
+    for ds, r, f in bad[:20]:
+        print(f"  {ds!r}: pandas={r} fast={f}")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_event_scan.py — Event-scan throughput over the cached filings
+#
+# Runs the per-pattern reference scan and the single-pass scanner from
+# sec_extract_events_from_txt.py over the same documents the extractor would scan
+# (top 8 candidate documents per cached filing), checks they agree, and prints MB/s.
+#
+#   python bench_event_scan.py [--limit N] [--repeat R]
+
+import time
+import argparse
+
+import filing_cache
+import filing_docs
+import sec_extract_events_from_txt as ext
+
+
+def load_texts(limit: int = 0):
+    texts = []
+    entries = filing_cache.entries()
+    if limit:
+        entries = entries[:limit]
+    for e in entries:
+        _, docs = filing_docs.get_documents(e["cik"], e["accession"])
+        ranked = sorted([(ext.doc_score(dt), dt, tx) for dt, tx in docs], reverse=True, key=lambda x: x[0])
+        texts.extend([tx for s, _, tx in ranked if s > 0][:8])  # same selection as the extractor
+    return len(entries), texts
+
+
+def run(scan, texts, repeat: int):
+    best = None
+    hits = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [[(etype, m.span()) for etype, m in scan(t)] for t in texts]
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+        hits = out
+    return best, hits
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the SEC event scanners over cached filings")
+    ap.add_argument("--limit", type=int, default=0, help="only the first N cached filings (0 = all)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per scanner; the best is reported")
+    args = ap.parse_args(argv)
+
+    n_filings, texts = load_texts(args.limit)
+    mb = sum(len(t) for t in texts) / 1e6
+    if not texts:
+        print(f"No cached filings with document blocks under {filing_cache.CACHE_DIR}")
+        return
+    print(f"{n_filings} filings, {len(texts)} documents, {mb:.1f}MB of text")
+
+    t_old, hits_old = run(ext.scan_events_per_pattern, texts, args.repeat)
+    t_new, hits_new = run(ext.scan_events, texts, args.repeat)
+    n_hits = sum(len(h) for h in hits_new)
+
+    print(f"per-pattern : {t_old:.3f}s  {mb / t_old:.1f} MB/s")
+    print(f"single-pass : {t_new:.3f}s  {mb / t_new:.1f} MB/s  ({t_old / t_new:.1f}x)")
+    print(f"hits={n_hits} identical={hits_old == hits_new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# bench_merge_calendar.py — Parity + speed check for merge_calendar_master's vectorized passes
+#
+# Keeps the previous row-wise implementations (apply/iterrows) of the last_seen refresh,
+# prefer_best_per_key, drop_approx_if_exact_exists and recompute_days_to_event as the reference,
+# builds synthetic sources + master (blank and unparseable dates and windows, duplicate keys,
+# approximate 0/1/2 and junk, blank first_seen_utc), merges them with both
+# under a frozen clock, merges the result again with a second batch, and compares the masters
+# as written to CSV. The shipped out/ files are checked too when present.
+#
+#   python bench_merge_calendar.py [--rows N] [--seeds K] [--no-out]
+#
+# Exits with status 1 if any master differs.
+
+import io
+import sys
+import time
+import random
+import argparse
+import warnings
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import merge_calendar_master as mcm
+
+NOW = datetime(2026, 1, 30, 12, 0, tzinfo=timezone.utc)
+
+
+class FrozenClock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz is not None else NOW.replace(tzinfo=None)
+
+
+# ----------------------------
+# Reference: the row-wise passes as they were before vectorization
+# ----------------------------
+def ref_refresh_last_seen(combined, new, now_iso):
+    if not new.empty:
+        new_keys = set(new[mcm.KEY_COLS].astype(str).apply(tuple, axis=1).tolist())
+        combined["__key__"] = combined[mcm.KEY_COLS].astype(str).apply(tuple, axis=1)
+        combined.loc[combined["__key__"].isin(new_keys), "last_seen_utc"] = now_iso
+        combined.drop(columns=["__key__"], inplace=True)
+    return combined
+
+
+def ref_recompute_days_to_event(df):
+    if df.empty:
+        return df
+    today = FrozenClock.now(timezone.utc).date()
+    dt = pd.to_datetime(df["catalyst_date"], errors="coerce").dt.date
+    df["days_to_event"] = (dt - today).apply(lambda x: x.days if pd.notna(x) else 9999)
+    df["days_to_event"] = pd.to_numeric(df["days_to_event"], errors="coerce").fillna(9999).astype(int).astype(str)
+    return df
+
+
+def ref_prefer_best_per_key(df):
+    if df.empty:
+        return df
+    KEY_COLS = mcm.KEY_COLS
+    df["_approx_int"] = pd.to_numeric(df["approximate"], errors="coerce").fillna(0).astype(int)
+    df["_src_rank"] = df["date_source"].apply(mcm.source_rank_val)
+    if "filingDate" not in df.columns:
+        df["filingDate"] = ""
+    if "mention_date" not in df.columns:
+        df["mention_date"] = ""
+    df["_filing_dt"] = pd.to_datetime(df["filingDate"], errors="coerce")
+    df["_mention_dt"] = pd.to_datetime(df["mention_date"], errors="coerce")
+    df["_has_url"] = (df["doc_url"].astype(str).str.len() > 0).astype(int)
+    if "context" not in df.columns:
+        df["context"] = ""
+    df["_ctx_len"] = df["context"].astype(str).str.len()
+    df["_last_seen"] = pd.to_datetime(df["last_seen_utc"], errors="coerce")
+    df = df.sort_values(
+        by=["_approx_int", "_conf", "_src_rank", "_filing_dt", "_mention_dt", "_last_seen", "_has_url", "_ctx_len"],
+        ascending=[True, False, False, False, False, False, False, False],
+    )
+    first_seen_map = (
+        df.groupby(KEY_COLS, dropna=False)["first_seen_utc"]
+        .apply(lambda s: sorted([x for x in s if str(x).strip()])[:1][0] if any(str(x).strip() for x in s) else "")
+    )
+    df = df.drop_duplicates(subset=KEY_COLS, keep="first").copy()
+    df["first_seen_utc"] = df.apply(lambda r: first_seen_map.get(tuple(r[c] for c in KEY_COLS), r["first_seen_utc"]), axis=1)
+    for c in ["_approx_int","_src_rank","_filing_dt","_mention_dt","_has_url","_ctx_len","_last_seen","_conf"]:
+        if c in df.columns:
+            df.drop(columns=[c], inplace=True)
+    return df
+
+
+def ref_drop_approx_if_exact_exists(df):
+    if df.empty:
+        return df
+    d = df.copy()
+    d["_approx_int"] = pd.to_numeric(d["approximate"], errors="coerce").fillna(0).astype(int)
+    exact = d[d["_approx_int"] == 0].copy()
+    if exact.empty:
+        d.drop(columns=["_approx_int"], inplace=True)
+        return d
+    exact_dates = exact[["ticker","event_type","catalyst_date"]].copy()
+    exact_dates["_exact_dt"] = pd.to_datetime(exact_dates["catalyst_date"], errors="coerce").dt.date
+    exact_pairs = set(exact_dates[["ticker","event_type"]].astype(str).apply(tuple, axis=1).tolist())
+
+    d["_ws"] = pd.to_datetime(d["catalyst_window_start"], errors="coerce").dt.date
+    d["_we"] = pd.to_datetime(d["catalyst_window_end"], errors="coerce").dt.date
+    pair_to_dates = {}
+    for _, r in exact_dates.iterrows():
+        pair = (str(r["ticker"]), str(r["event_type"]))
+        dt0 = r["_exact_dt"]
+        if pd.notna(dt0):
+            pair_to_dates.setdefault(pair, []).append(dt0)
+
+    def should_drop(row):
+        pair = (str(row["ticker"]), str(row["event_type"]))
+        if pair not in exact_pairs:
+            return False
+        if int(row["_approx_int"]) != 1:
+            return False
+        ws, we = row["_ws"], row["_we"]
+        if pd.isna(ws) or pd.isna(we):
+            return True
+        for dt0 in pair_to_dates.get(pair, []):
+            if ws <= dt0 <= we:
+                return True
+        return False
+
+    mask = d.apply(should_drop, axis=1)
+    d = d[~mask].copy()
+    d.drop(columns=["_ws", "_we", "_approx_int"], inplace=True)
+    return d
+
+
+def ref_merge(new, master, now_iso):
+    """merge_calendar_master.merge with the reference passes."""
+    all_cols = sorted(set(list(new.columns) + list(master.columns) + mcm.KEY_COLS + mcm.META_COLS + mcm.WINDOW_COLS))
+    new = mcm.normalize(mcm.ensure_cols(new, all_cols))
+    master = mcm.normalize(mcm.ensure_cols(master, all_cols))
+    new["first_seen_utc"] = now_iso
+    new["last_seen_utc"] = now_iso
+    combined = pd.concat([master, new], ignore_index=True)
+    combined = ref_refresh_last_seen(combined, new, now_iso)
+    combined = ref_prefer_best_per_key(combined)
+    combined = ref_drop_approx_if_exact_exists(combined)
+    combined = mcm.drop_past(combined)
+    combined = ref_recompute_days_to_event(combined)
+    combined["_days"] = pd.to_numeric(combined["days_to_event"], errors="coerce").fillna(9999).astype(int)
+    combined["_conf2"] = pd.to_numeric(combined.get("confidence",""), errors="coerce").fillna(0.0)
+    return combined.sort_values(["_days","_conf2"], ascending=[True, False]).drop(columns=["_days","_conf2"])
+
+
+# ----------------------------
+# Synthetic inputs
+# ----------------------------
+COLS = ["ticker","event_type","catalyst_date","days_to_event","approximate","approx_token","filingDate",
+        "confidence","date_source","doc_url","context","catalyst_window_end","catalyst_window_start",
+        "first_seen_utc","last_seen_utc","mention_date"]
+NEWS_COLS = COLS[:11]  # news_catalysts.csv carries no windows or meta columns
+
+DATES = ["2026-02-15", "2026-03-01", "2026-01-10", "2026-06-30", "", "TBD", "2026-02-30",
+         "2026-03-01T00:00:00", "2027-01-01"]
+WIN_START = ["", "2026-01-01", "2026-02-01", "2026-04-01", "bad"]
+WIN_END = ["", "2026-03-31", "2026-02-28", "2026-12-31", "nope"]
+SEEN = ["", " ", "2026-01-02T00:00:00+00:00", "2026-01-05T00:00:00+00:00", "2025-12-31T00:00:00+00:00"]
+
+
+def synth(rnd: random.Random, n: int, cols: list) -> pd.DataFrame:
+    tickers = [f"t{i}" for i in range(max(5, n // 40))] + [" abc ", "ABC"]
+    rows = []
+    for _ in range(n):
+        rows.append([
+            rnd.choice(tickers), rnd.choice(["PDUFA", "NDA_BLA_SUBMISSION", "TOPLINE", " ADCOM"]),
+            rnd.choice(DATES), "", rnd.choice(["0", "1", "1", "2", "", "x", "1.0"]),
+            rnd.choice(["Q1 2026", "1H26", ""]), rnd.choice(["2026-01-12", "2026-01-29", ""]),
+            rnd.choice(["0.75", "0.9", "", "abc", "0.5"]),
+            rnd.choice(["filing_txt:EX-99.1", "mentions", "news", "", "sec"]),
+            rnd.choice(["", "https://x/1", "https://x/2"]), rnd.choice(["", "ctx", "longer context"]),
+            rnd.choice(WIN_END), rnd.choice(WIN_START), rnd.choice(SEEN), rnd.choice(SEEN),
+            rnd.choice(["", "2026-01-20"]),
+        ][:len(cols)])
+    return as_read(pd.DataFrame(rows, columns=cols))
+
+
+def as_read(df: pd.DataFrame) -> pd.DataFrame:
+    """The frame as merge_calendar_master.safe_read_csv would load it from disk."""
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    return pd.read_csv(buf, dtype=str).fillna("")
+
+
+def master_csv(df: pd.DataFrame) -> str:
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+def compare(label: str, new: pd.DataFrame, master: pd.DataFrame, now_iso: str):
+    """Merges with both implementations; returns (ok, merged master as read back, seconds ref, seconds new)."""
+    t0 = time.perf_counter()
+    a = master_csv(ref_merge(new.copy(), master.copy(), now_iso))
+    t1 = time.perf_counter()
+    b = master_csv(mcm.merge(new.copy(), master.copy(), now_iso))
+    t2 = time.perf_counter()
+    ok = a == b
+    rows = b.count("\n") - 1
+    print(f"{label:<24} rows={rows:<7} ref={t1 - t0:.2f}s new={t2 - t1:.2f}s {'OK' if ok else 'DIFFERENT'}")
+    if not ok:
+        la, lb = a.splitlines(), b.splitlines()
+        for i, (x, y) in enumerate(zip(la, lb)):
+            if x != y:
+                print(f"  first difference at line {i + 1}:\n    ref: {x[:160]}\n    new: {y[:160]}")
+                break
+        else:
+            print(f"  line counts differ: ref={len(la)} new={len(lb)}")
+    return ok, pd.read_csv(io.StringIO(b), dtype=str).fillna("")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parity + speed: merge_calendar_master vs the row-wise passes")
+    ap.add_argument("--rows", type=int, default=2000, help="rows per synthetic source batch")
+    ap.add_argument("--seeds", type=int, default=3, help="synthetic cases")
+    ap.add_argument("--no-out", action="store_true", help="skip the out/ calendar files")
+    args = ap.parse_args(argv)
+
+    mcm.datetime = FrozenClock  # drop_past / days_to_event use "today"
+    warnings.simplefilter("ignore", UserWarning)  # dateutil fallback on the junk dates
+    now_iso = NOW.isoformat()
+    later_iso = NOW.replace(hour=18).isoformat()
+
+    ok = True
+    for seed in range(1, args.seeds + 1):
+        rnd = random.Random(seed)
+        n = args.rows
+        new = pd.concat([synth(rnd, n, COLS), synth(rnd, n // 3, NEWS_COLS)], ignore_index=True)
+        master = synth(rnd, 2 * n, COLS)
+        good, merged = compare(f"seed {seed}", new, master, now_iso)
+        ok &= good
+        # second merge: yesterday's master plus a batch that repeats some of today's rows
+        again = pd.concat([synth(rnd, n // 2, COLS), new.sample(frac=0.3, random_state=seed)], ignore_index=True)
+        good, _ = compare(f"seed {seed}, second merge", again, merged, later_iso)
+        ok &= good
+
+    if not args.no_out:
+        parts = [x for x in (mcm.safe_read_csv(p) for p in mcm.SOURCES) if not x.empty]
+        new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        master = mcm.safe_read_csv(mcm.MASTER_OUT)
+        if new.empty or master.empty:
+            print(f"{mcm.MASTER_OUT} or its sources missing/empty -> skipped")
+        else:
+            good, merged = compare("out/", new, master, now_iso)
+            ok &= good
+            good, _ = compare("out/, second merge", new, merged, later_iso)
+            ok &= good
+
+    print("All masters identical" if ok else "MISMATCH between reference and vectorized merge")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
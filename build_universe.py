@@ -2,17 +2,15 @@
 import re
 import io
 import json
-import requests
 import pandas as pd
 
+import sec_client  # shared session + retry policy; SEC hosts are also rate limited (set SEC_USER_AGENT)
+
 NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/symdir/nasdaqlisted.txt"
 OTHER_LISTED_URL  = "https://www.nasdaqtrader.com/dynamic/symdir/otherlisted.txt"
 
 SEC_TICKERS_EXCHANGE_URL = "https://www.sec.gov/files/company_tickers_exchange.json"
 
-# Set a real contact string (SEC recommends identifying your app; also helps avoid 403s)
-USER_AGENT = "lia-biopharma-universe/0.1 (contact: your_email@example.com)"
-
 INCLUDE_REGEX = re.compile(
     r"(?:bio|biotech|therapeut|pharma|pharmaceut|oncolog|genom|biologic|bioscien|life\s+scien)",
     re.IGNORECASE
@@ -25,14 +23,10 @@ EXCLUDE_NAME_REGEX = re.compile(
 
 
 def http_get_text(url: str) -> str:
-    r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=60)
-    r.raise_for_status()
-    return r.text
+    return sec_client.get_text(url)
 
 def http_get_json(url: str):
-    r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=60)
-    r.raise_for_status()
-    return r.json()
+    return sec_client.get_json(url)
 
 def parse_nasdaq_listed(txt: str) -> pd.DataFrame:
     df = pd.read_csv(io.StringIO(txt), sep="|", dtype=str)
@@ -122,6 +116,7 @@ def main():
 
     print("Wrote universe_all.csv and universe_biopharma.csv")
     print("Counts:", len(merged), "total,", int(merged["biopharma_flag"].sum()), "biopharma candidates")
+    sec_client.print_metrics()
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,13 @@
 # diagnose_calendar_yield.py
 import pandas as pd
-import requests
 import re
 
-USER_AGENT = "lia-biopharma/0.1 (contact: you@example.com)"  # CHANGE THIS
+import sec_client  # shared session, rate limit, retry policy (set SEC_USER_AGENT)
+
 IN_EVENTS = "out/sec_events_consolidated.csv"
 
 DATE_RELEVANT = {"PDUFA", "ADCOM", "FILING_ACCEPTANCE", "NDA_BLA_SUBMISSION", "TOPLINE"}
 
-def get_session():
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept-Encoding": "gzip, deflate",
-        "Host": "www.sec.gov",
-    })
-    return s
-
 def quick_types_from_index(html: str, maxn=12):
     # very lightweight: find td cells that look like "EX-99.1", "99.1", "8-K", etc.
     cells = re.findall(r"(?is)<td[^>]*>(.*?)</td>", html)
@@ -52,8 +43,6 @@ def main():
         print("=> This explains the 6-row calendar: there just aren’t many date-bearing event types yet.")
         return
 
-    s = get_session()
-
     print("\n=== Checking first 20 date-relevant rows: index_url status + top types ===")
     for i, r in ddf.head(20).iterrows():
         ticker = r.get("ticker", "")
@@ -64,12 +53,14 @@ def main():
             print(f"{ticker} {et}: missing index_url (doc={doc})")
             continue
         try:
-            resp = s.get(idx, timeout=30)
+            resp = sec_client.get(idx, timeout=30, raise_errors=False)
             status = resp.status_code
             types = quick_types_from_index(resp.text) if status == 200 else []
             print(f"{ticker} {et}: index {status} | types: {types}")
         except Exception as e:
             print(f"{ticker} {et}: index ERROR {type(e).__name__}: {e}")
 
+    sec_client.print_metrics()
+
 if __name__ == "__main__":
     main()
@@ -2,13 +2,18 @@
 from multiprocessing import context
 import os
 import re
-import time
-import random
 from datetime import datetime, timedelta, date
 from typing import List, Tuple, Dict, Optional
 import html
+import argparse
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import requests
+
+import sec_client  # shared session, rate limit, retry policy (set SEC_USER_AGENT)
+import filing_cache  # shared compressed filing store (filled by sec_extract_events_from_txt.py)
+import filing_docs  # parse-once (doc_type, stripped_text) store
 
 
 
@@ -16,23 +21,19 @@ import requests
 # -----------------------------
 # CONFIG
 # -----------------------------
-USER_AGENT = "lia-biopharma/0.1 (contact: you@example.com)"  # <-- CHANGE THIS
 INPUT_EVENTS = "out/sec_events_consolidated_with_accession.csv"
 
 OUT_CAL = "out/catalyst_calendar.csv"
 OUT_MD = "out/catalyst_calendar.md"
 
-CACHE_DIR = "data/cache/sec_filing_txt"
-
-# Be gentle with SEC
-SLEEP_BASE_SEC = 0.8
-MAX_RETRIES = 7
-RETRY_STATUSES = {403, 429, 503}
 HORIZON_DAYS = 730  # 2 years
 
 # Only these event types usually produce calendar-able dates
 DATE_RELEVANT = {"PDUFA", "ADCOM", "FILING_ACCEPTANCE", "NDA_BLA_SUBMISSION", "TOPLINE"}
 
+# Worker processes for parse + date mining (1 = serial; output is identical either way)
+WORKERS = int(os.getenv("SEC_CALENDAR_WORKERS", "1"))
+
 # If you want to limit rows for testing, set to an int (e.g. 50). Use None for all.
 MAX_ROWS = None
 
@@ -123,94 +124,15 @@ PAT_EARLYMID = re.compile(r"\b(early|mid|late)\s+(20\d{2})\b", re.I)  # mid 2026
 # -----------------------------
 # SEC / EDGAR HELPERS
 # -----------------------------
-def get_session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept-Encoding": "gzip, deflate",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    })
-    return s
-
-
-def jitter_sleep(base: float, i: int) -> None:
-    # exponential-ish backoff with jitter
-    delay = min(30.0, (2 ** i) + random.random() + base)
-    time.sleep(delay)
-
-
-def sec_get_with_retry(s: requests.Session, url: str) -> str:
-    last_status = None
-    for i in range(MAX_RETRIES):
-        r = s.get(url, timeout=60)
-        last_status = r.status_code
-        if r.status_code == 200:
-            return r.text
-        if r.status_code in RETRY_STATUSES:
-            jitter_sleep(SLEEP_BASE_SEC, i)
-            continue
-        # other errors: hard fail
-        r.raise_for_status()
-    raise RuntimeError(f"SEC fetch failed after retries: status={last_status} url={url}")
-
-
-def cik_int(cik10: str) -> str:
-    # Convert "0000123456" -> "123456"
-    return str(int(str(cik10)))
-
-
-def filing_txt_url(cik10: str, accession: str) -> str:
-    # EDGAR complete submission .txt
-    # /Archives/edgar/data/{cik}/{accession-with-dashes}.txt
-    return f"https://www.sec.gov/Archives/edgar/data/{cik_int(cik10)}/{accession}.txt"
-
-
-def load_filing_txt(s: requests.Session, cik10: str, accession: str) -> str:
-    os.makedirs(os.path.join(CACHE_DIR, cik_int(cik10)), exist_ok=True)
-    path = os.path.join(CACHE_DIR, cik_int(cik10), f"{accession}.txt")
-
-    if os.path.exists(path) and os.path.getsize(path) > 0:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
-
-    url = filing_txt_url(cik10, accession)
-    txt = sec_get_with_retry(s, url)
-
-    with open(path, "w", encoding="utf-8", errors="ignore") as f:
-        f.write(txt)
-
-    # Polite pacing
-    time.sleep(SLEEP_BASE_SEC)
-    return txt
+cik_int = filing_cache.cik_int
+filing_txt_url = filing_cache.filing_txt_url
 
 
 # -----------------------------
 # PARSING EDGAR COMPLETE SUBMISSION (.txt)
 # -----------------------------
-def strip_html(x: str) -> str:
-    # Good enough for keyword scanning
-    x = re.sub(r"(?is)<script.*?>.*?</script>", " ", x)
-    x = re.sub(r"(?is)<style.*?>.*?</style>", " ", x)
-    x = re.sub(r"(?s)<.*?>", " ", x)
-    x = re.sub(r"\s+", " ", x)
-    return x.strip()
-
-
-def parse_documents(filing_txt: str) -> List[Tuple[str, str]]:
-    """
-    Extract (doc_type, text_content) from <DOCUMENT> blocks.
-    """
-    parts = filing_txt.split("<DOCUMENT>")
-    docs: List[Tuple[str, str]] = []
-    for p in parts[1:]:
-        mtype = re.search(r"(?im)^<TYPE>(.+)$", p)
-        mtext = re.search(r"(?is)<TEXT>(.*)</TEXT>", p)
-        dtype = (mtype.group(1).strip() if mtype else "").strip()
-        body = (mtext.group(1) if mtext else "")
-        if not body:
-            continue
-        docs.append((dtype, strip_html(body)))
-    return docs
+strip_html = filing_docs.strip_html
+parse_documents = filing_docs.parse_documents
 
 
 def doc_priority(dtype: str) -> int:
@@ -259,59 +181,143 @@ def approximate_to_date(token: str, year: int) -> date:
     if tok == "late":
         return date(year, 10, 15)
     return date(year, 6, 15)
-def extract_dates_from_text(text: str) -> Tuple[List[date], List[Tuple[date, str]]]:
+
+
+# Fast parser for the four DATE_PATTERNS_EXACT token shapes. Matches
+# pd.to_datetime(ds, errors="coerce") on every string those patterns can produce
+# (checked by bench_date_parser.py), without the per-call pandas/dateutil overhead:
+#   "March 15, 2026" / "15 Mar 2026"  year < 100 is read like a 2-digit year ("0076" -> 1976)
+#   "2026-03-15"                      taken as is
+#   "3/15/2026"                       M/D/Y, or D/M/Y when the first number is > 12;
+#                                     2-digit years use the same rolling century
+# Impossible dates, and year 0, give None.
+MONTH_NUM = {}
+for _i, _name in enumerate(["january", "february", "march", "april", "may", "june", "july",
+                            "august", "september", "october", "november", "december"], 1):
+    MONTH_NUM[_name] = _i
+    MONTH_NUM[_name[:3]] = _i
+
+
+def _two_digit_year(y: int) -> int:
+    # dateutil's rule: nearest year within 50 years of the current one
+    this_year = date.today().year
+    y += this_year // 100 * 100
+    if y >= this_year + 50:
+        y -= 100
+    elif y < this_year - 50:
+        y += 100
+    return y
+
+
+def _make_date(y: int, m: int, d: int) -> Optional[date]:
+    try:
+        return date(y, m, d)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def parse_exact_date(ds: str) -> Optional[date]:
+    try:
+        if "/" in ds:
+            a, b, ys = ds.split("/")
+            a, b, y = int(a), int(b), int(ys)
+            if a > 31 and 0 < y <= 31:
+                y, m, d = a, b, y  # Y/M/D: the first number can only be a year
+            elif a > 12:
+                m, d = b, a
+            else:
+                m, d = a, b
+            if len(ys) == 2:
+                y = _two_digit_year(y)
+            return _make_date(y, m, d) if y else None
+        if "-" in ds:
+            y, m, d = (int(x) for x in ds.split("-"))
+            return _make_date(y, m, d) if y else None
+        parts = ds.replace(",", " ").split()
+        if parts[0][0].isdigit():
+            d, mon, y = parts
+        else:
+            mon, d, y = parts
+        d, y = int(d), int(y)
+        if d > 31 and 0 < y <= 31:
+            d, y = y, d  # "March 45, 0012" reads as 2045-03-12
+        if y < 100:
+            y = _two_digit_year(y)
+        return _make_date(y, MONTH_NUM[mon.lower()], d)
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+# -----------------------------
+# PER-DOCUMENT DATE/ANCHOR INDEX
+# -----------------------------
+# Each candidate document is scanned once for every date token (parsed once) and, lazily,
+# for each anchor type. Windows around anchors then become range queries over the sorted
+# token offsets instead of fresh regex passes over overlapping text windows.
+# A token counts for a window when it lies wholly inside it (tokens cut by a window edge
+# are no longer re-read as shorter, different dates).
+def _token_run(pat: re.Pattern, text: str, value) -> Tuple[List[int], List[int], list]:
+    starts, ends, vals = [], [], []
+    for m in pat.finditer(text):
+        starts.append(m.start())
+        ends.append(m.end())
+        vals.append(value(m))
+    return starts, ends, vals
+
+
+def index_document(text: str) -> Dict:
+    """
+    {"text", "exact": [(starts, ends, dates)] per DATE_PATTERNS_EXACT pattern,
+     "approx": [(starts, ends, (date, token))] for PAT_Q, PAT_H, PAT_EARLYMID, "anchors": {}}
+    Runs are in match order, so starts and ends are both sorted.
+    """
+    exact = [_token_run(pat, text, lambda m: parse_exact_date(m.group(0))) for pat in DATE_PATTERNS_EXACT]
+    approx = [
+        _token_run(PAT_Q, text, lambda m: (approximate_to_date(f"Q{m.group(1)}", int(m.group(2))), m.group(0))),
+        _token_run(PAT_H, text, lambda m: (approximate_to_date(f"H{m.group(1)}", int(m.group(2))), m.group(0))),
+        _token_run(PAT_EARLYMID, text, lambda m: (approximate_to_date(m.group(1).lower(), int(m.group(2))), m.group(0))),
+    ]
+    return {"text": text, "exact": exact, "approx": approx, "anchors": {}}
+
+
+def _in_span(run, a: int, b: int) -> list:
+    starts, ends, vals = run
+    return vals[bisect_left(starts, a):bisect_right(ends, b)]
+
+
+def dates_in_span(idx: Dict, a: int, b: int) -> Tuple[List[date], List[Tuple[date, str]]]:
     """
-    Returns:
+    Date tokens wholly inside text[a:b]:
       exact_dates: list[date]
       approx_dates: list[(date, token_str)]  token_str like "Q2 2026" or "mid 2026"
     """
-    exact: List[date] = []
-    approx: List[Tuple[date, str]] = []
-
-    # Exact formats
-    for pat in DATE_PATTERNS_EXACT:
-        for m in pat.finditer(text):
-            ds = m.group(0)
-            dt = pd.to_datetime(ds, errors="coerce")
-            if pd.notna(dt):
-                exact.append(dt.date())
-
-    # Approximate formats
-    for m in PAT_Q.finditer(text):
-        q = m.group(1)
-        y = int(m.group(2))
-        approx.append((approximate_to_date(f"Q{q}", y), m.group(0)))
-
-    for m in PAT_H.finditer(text):
-        h = m.group(1)
-        y = int(m.group(2))
-        approx.append((approximate_to_date(f"H{h}", y), m.group(0)))
-
-    for m in PAT_EARLYMID.finditer(text):
-        w = m.group(1).lower()
-        y = int(m.group(2))
-        approx.append((approximate_to_date(w, y), m.group(0)))
-
     # de-dupe exact dates while preserving order
     seen = set()
     exact_out = []
-    for d in exact:
-        if d not in seen:
-            seen.add(d)
-            exact_out.append(d)
+    for run in idx["exact"]:
+        for d in _in_span(run, a, b):
+            if d is not None and d not in seen:
+                seen.add(d)
+                exact_out.append(d)
 
     # de-dupe approx by (date, token)
     seen2 = set()
     approx_out = []
-    for d, tok in approx:
-        k = (d, tok.lower())
-        if k not in seen2:
-            seen2.add(k)
-            approx_out.append((d, tok))
+    for run in idx["approx"]:
+        for d, tok in _in_span(run, a, b):
+            k = (d, tok.lower())
+            if k not in seen2:
+                seen2.add(k)
+                approx_out.append((d, tok))
 
     return exact_out, approx_out
 
 
+def extract_dates_from_text(text: str) -> Tuple[List[date], List[Tuple[date, str]]]:
+    return dates_in_span(index_document(text), 0, len(text))
+
+
 def pick_best_future(dates: List[date], today: date, horizon_days: int) -> Optional[date]:
     if not dates:
         return None
@@ -320,18 +326,170 @@ def pick_best_future(dates: List[date], today: date, horizon_days: int) -> Optio
     return min(future) if future else None
 
 
-def windows_around_anchor(text: str, anchor: re.Pattern, win: int = 1400, max_windows: int = 8) -> List[str]:
+def anchor_spans(idx: Dict, etype: str, anchor: Optional[re.Pattern], win: int = 1400, max_windows: int = 8) -> List[Tuple[int, int]]:
     """
-    Extract a few windows around anchor hits to avoid picking unrelated dates.
+    (start, end) windows around the first anchor hits, to avoid picking unrelated dates.
+    Falls back to the first 9000 chars.
     """
-    windows = []
-    for m in anchor.finditer(text):
-        a = max(0, m.start() - win)
-        b = min(len(text), m.end() + win)
-        windows.append(text[a:b])
-        if len(windows) >= max_windows:
-            break
-    return windows if windows else [text[:9000]]
+    text = idx["text"]
+    if anchor is None:
+        return [(0, min(len(text), 9000))]
+    if etype not in idx["anchors"]:
+        spans = []
+        for m in anchor.finditer(text):
+            spans.append((max(0, m.start() - win), min(len(text), m.end() + win)))
+            if len(spans) >= max_windows:
+                break
+        idx["anchors"][etype] = spans
+    return idx["anchors"][etype] or [(0, min(len(text), 9000))]
+
+
+def resolve_event_date(indexes: List[Tuple[str, Dict]], etype: str, today: date) -> Optional[Dict]:
+    """
+    Best future catalyst date for one event type over a filing's indexed candidate docs
+    [(doc_type, index_document(text))], or None.
+    """
+    anchor = ANCHORS.get(etype)
+
+    exact_all: List[date] = []
+    approx_all: List[Tuple[date, str]] = []
+    best_context = ""
+    best_src = ""
+
+    for dtype, idx in indexes:
+        # focus windows near anchor when possible
+        for a, b in anchor_spans(idx, etype, anchor, win=1400, max_windows=8):
+            exact, approx = dates_in_span(idx, a, b)
+            if exact:
+                exact_all.extend(exact)
+            if approx:
+                approx_all.extend(approx)
+
+            if not best_context and (exact or approx):
+                best_context = idx["text"][a:min(b, a + 500)]
+                best_src = dtype
+
+    # choose best exact future date; otherwise approximate
+    best_date = pick_best_future(exact_all, today, HORIZON_DAYS)
+    approximate = 0
+    approx_token = ""
+
+    if best_date is None and approx_all:
+        approx_dates = [d for d, _ in approx_all]
+        best_date = pick_best_future(approx_dates, today, HORIZON_DAYS)
+        if best_date:
+            approximate = 1
+            for d, tok in approx_all:
+                if d == best_date:
+                    approx_token = tok
+                    break
+    if best_date is None:
+        return None
+    win_start = best_date
+    win_end = best_date
+    if approximate == 1:
+        ws, we = approx_token_to_window(approx_token)
+        if ws and we:
+            win_start, win_end = ws, we
+
+    return {
+        "best_date": best_date, "approximate": approximate, "approx_token": approx_token,
+        "best_context": best_context, "best_src": best_src,
+        "win_start": win_start, "win_end": win_end,
+    }
+
+
+# -----------------------------
+# PER-FILING WORK (serial or in worker processes)
+# -----------------------------
+def process_accession(job: Tuple[str, str, List[Dict], date]) -> List[Tuple[int, Dict]]:
+    """
+    Calendar rows for one filing's event rows: job = (accession, cik10, records, today).
+    Loads/parses/indexes the filing once; every event row of it reuses the index.
+    Returns [(_pos, row)] (empty if the filing can't be loaded).
+    """
+    accession, cik10, records, today = job
+    # Parsed documents (stored by the event stage; else filing cache + retry, then parse)
+    try:
+        _, docs = filing_docs.get_documents(cik10, accession)
+    except Exception as e:
+        # Skip if SEC blocks this one
+        return []
+
+    candidates = select_candidate_docs(docs, max_docs=6)
+    if not candidates:
+        return []
+
+    indexes = [(dtype, index_document(text)) for dtype, text in candidates]
+    resolved: Dict[str, Optional[Dict]] = {}
+    rows: List[Tuple[int, Dict]] = []
+
+    for r in records:
+        pos = r["_pos"]
+        ticker = r["ticker"]
+        cik10 = r["cik"]
+        etype = r["event_type"]
+        filingDate = r.get("filingDate", "")
+        conf = float(r.get("confidence_num", 0.0))
+
+        if etype not in resolved:
+            resolved[etype] = resolve_event_date(indexes, etype, today)
+        res = resolved[etype]
+        if res is None:
+            continue
+
+        best_date = res["best_date"]
+        approximate = res["approximate"]
+        approx_token = res["approx_token"]
+        best_context = res["best_context"]
+        best_src = res["best_src"]
+        win_start, win_end = res["win_start"], res["win_end"]
+
+        rows.append((pos, {
+            "ticker": ticker,
+            "event_type": etype,
+            "catalyst_date": best_date.isoformat(),
+            "days_to_event": (best_date - today).days,
+            "approximate": approximate,
+            "approx_token": approx_token,
+            "filingDate": filingDate,
+            "confidence": conf,
+            "date_source": f"filing_txt:{best_src or 'UNKNOWN'}",
+            "doc_url": filing_txt_url(cik10, accession),
+            "context": html.unescape((best_context or "").strip()[:500]),
+            "catalyst_window_start": win_start.isoformat() if win_start else "",
+            "catalyst_window_end": win_end.isoformat() if win_end else "",
+        }))
+    return rows
+
+
+def prefetch_filings(jobs: List[Tuple]) -> List[Tuple]:
+    """
+    Parallel mode: do any downloading here, in the parent (one session, one rate limiter),
+    so workers only read the caches. Jobs whose filing can't be fetched, or has no
+    <DOCUMENT> blocks, are dropped; the serial path skips them the same way.
+    """
+    kept = []
+    for job in jobs:
+        accession, cik10 = job[0], job[1]
+        if filing_docs.load_parsed(accession) is None:
+            try:
+                if not filing_cache.ensure_cached(cik10, accession)["has_document_blocks"]:
+                    continue
+            except Exception:
+                continue
+        kept.append(job)
+    return kept
+
+
+def process_jobs(jobs: List[Tuple], workers: int = 1) -> List[List[Tuple[int, Dict]]]:
+    """Run process_accession over all jobs, batched across worker processes when workers > 1."""
+    if workers <= 1 or len(jobs) < 2:
+        return [process_accession(j) for j in jobs]
+    jobs = prefetch_filings(jobs)
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(process_accession, jobs, chunksize=chunksize))
 
 
 # -----------------------------
@@ -392,7 +550,13 @@ def write_empty_outputs(today: date) -> None:
     print(f"Wrote {OUT_CAL} (0 rows) and {OUT_MD}")
 
 
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the catalyst calendar from SEC filing text")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help="processes for parse+date mining (default SEC_CALENDAR_WORKERS or 1)")
+    args = ap.parse_args(argv)
+    workers = max(1, args.workers)
+
     today = datetime.utcnow().date()
     os.makedirs("out", exist_ok=True)
 
@@ -432,109 +596,19 @@ def main():
 
     # numeric coercions
     df["confidence_num"] = pd.to_numeric(df["confidence"], errors="coerce").fillna(0.0)
+    df["_pos"] = range(len(df))
 
-    s = get_session()
-    rows_out: List[Dict] = []
-
-    for idx, r in df.iterrows():
-        ticker = r["ticker"]
-        cik10 = r["cik"]
-        etype = r["event_type"]
-        accession = r["accessionNumber"]
-        filingDate = r.get("filingDate", "")
-        conf = float(r.get("confidence_num", 0.0))
-
-        anchor = ANCHORS.get(etype)
-
-        # Pull filing txt (cached + retry)
-        try:
-            filing_txt = load_filing_txt(s, cik10, accession)
-        except Exception as e:
-            # Skip if SEC blocks this one
-            continue
-
-        docs = parse_documents(filing_txt)
-        candidates = select_candidate_docs(docs, max_docs=6)
-        if not candidates:
-            continue
-
-        exact_all: List[date] = []
-        approx_all: List[Tuple[date, str]] = []
-        best_context = ""
-        best_src = ""
+    # One job per filing; every event row of that filing reuses its parse/index
+    jobs = [
+        (accession, g["cik"].iloc[0], g.to_dict("records"), today)
+        for accession, g in df.groupby("accessionNumber", sort=False)
+    ]
+    rows_by_pos: Dict[int, Dict] = {}
+    for rows in process_jobs(jobs, workers):
+        rows_by_pos.update(rows)
 
-        for dtype, text in candidates:
-            # focus windows near anchor when possible
-            if anchor:
-                regions = windows_around_anchor(text, anchor, win=1400, max_windows=8)
-            else:
-                regions = [text[:9000]]
-
-            for region in regions:
-                exact, approx = extract_dates_from_text(region)
-                if exact:
-                    exact_all.extend(exact)
-                if approx:
-                    approx_all.extend(approx)
-
-                if not best_context and (exact or approx):
-                    best_context = region[:500]
-                    best_src = dtype
-
-        # choose best exact future date; otherwise approximate
-        best_date = pick_best_future(exact_all, today, HORIZON_DAYS)
-        approximate = 0
-        approx_token = ""
-
-        if best_date is None and approx_all:
-            approx_dates = [d for d, _ in approx_all]
-            best_date = pick_best_future(approx_dates, today, HORIZON_DAYS)
-            if best_date:
-                approximate = 1
-                for d, tok in approx_all:
-                    if d == best_date:
-                        approx_token = tok
-                        break
-        if best_date is None: 
-            continue 
-        win_start = best_date 
-        win_end = best_date 
-        if approximate == 1: 
-            ws, we = approx_token_to_window(approx_token) 
-            if ws and we: 
-                win_start, win_end = ws, we 
-        ctx_text = norm_text(best_context)
-        m = re.search(r"\bwithin\s+(\d{1,3})\s+days\b", ctx_text, re.I) 
-        if m and filingDate: 
-            n = int(m.group(1)) 
-            base = pd.to_datetime(filingDate, errors="coerce") 
-            if (not catalyst_date) or (str(catalyst_date).strip() == ""): 
-                tok, ws, we = approx_window_from_context(ctx_text, filingDate) 
-                if tok and ws and we: 
-                    approximate = 1
-                    approx_token = tok
-            # keep your existing catalyst_date field as midpoint so days_to_event works
-            mid = ws + (we - ws) // 2
-            catalyst_date = mid.isoformat()
-            if pd.notna(base): 
-                approximate = 1
-                approx_token = f"within {n} days"
-                catalyst_date = (base + pd.Timedelta(days=n)).date().isoformat()
-        rows_out.append({
-            "ticker": ticker,
-            "event_type": etype,
-            "catalyst_date": best_date.isoformat(),
-            "days_to_event": (best_date - today).days,
-            "approximate": approximate,
-            "approx_token": approx_token,
-            "filingDate": filingDate,
-            "confidence": conf,
-            "date_source": f"filing_txt:{best_src or 'UNKNOWN'}",
-            "doc_url": filing_txt_url(cik10, accession),
-            "context": html.unescape((best_context or "").strip()[:500]),
-            "catalyst_window_start": win_start.isoformat() if win_start else "",
-            "catalyst_window_end": win_end.isoformat() if win_end else "",
-        })
+    # back in input row order, as if processed row by row
+    rows_out: List[Dict] = [rows_by_pos[p] for p in sorted(rows_by_pos)]
 
     # Output
     cols = [
@@ -585,6 +659,7 @@ def main():
         f.write("\n".join(lines))
 
     print(f"Wrote {OUT_CAL} ({len(out)} rows) and {OUT_MD}")
+    sec_client.print_metrics()
 
 
 if __name__ == "__main__":
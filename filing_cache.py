@@ -0,0 +1,269 @@
+# filing_cache.py — Shared compressed cache for EDGAR complete-submission .txt files
+#
+# One store for every stage that reads filings (sec_extract_events_from_txt.py,
+# extract_catalyst_calendar_from_txt.py, inspect_filing_keywords.py), so each filing is
+# downloaded once per machine instead of once per stage.
+#
+# Layout:
+#   data/cache/sec_filings/blobs/ab/<sha256>.txt.gz   gzip'd filing text, named by content hash
+#   data/cache/sec_filings/index.sqlite               accession -> blob + size/fetch metadata
+#
+# Text is stored with universal newlines, i.e. exactly what the old plain-text caches
+# returned when read back. Files from the old per-stage caches are imported on first use
+# (or all at once with `python filing_cache.py --migrate`).
+#
+# Env vars:
+#   SEC_FILING_CACHE_DIR -> cache root (default data/cache/sec_filings)
+
+import os
+import io
+import gzip
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from typing import Optional, Dict, List
+
+import sec_client
+
+CACHE_DIR = os.getenv("SEC_FILING_CACHE_DIR", "data/cache/sec_filings")
+BLOB_DIR = os.path.join(CACHE_DIR, "blobs")
+INDEX_PATH = os.path.join(CACHE_DIR, "index.sqlite")
+
+# Plain-text caches written by older versions of the extractors
+LEGACY_DIRS = [
+    "data/cache/sec_filing_txt_for_events",
+    "data/cache/sec_filing_txt",
+]
+
+GZIP_LEVEL = 6
+
+_conn = None
+_conn_pid = None
+_lock = threading.Lock()
+
+
+def cik_int(cik10: str) -> str:
+    return str(int(str(cik10)))
+
+
+def filing_txt_url(cik10: str, accession: str) -> str:
+    # /Archives/edgar/data/{cik}/{accession-with-dashes}.txt
+    return f"https://www.sec.gov/Archives/edgar/data/{cik_int(cik10)}/{accession}.txt"
+
+
+def _db() -> sqlite3.Connection:
+    global _conn, _conn_pid
+    # SQLite connections must not cross fork(): worker processes open their own
+    if _conn is None or _conn_pid != os.getpid():
+        _conn_pid = os.getpid()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _conn = sqlite3.connect(INDEX_PATH, check_same_thread=False, timeout=60)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS filings (
+                accession TEXT PRIMARY KEY,
+                cik TEXT,
+                sha256 TEXT,
+                size INTEGER,
+                stored_size INTEGER,
+                has_document_blocks INTEGER,
+                fetched_utc TEXT,
+                source TEXT
+            )
+            """
+        )
+        _conn.commit()
+    return _conn
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], f"{sha256}.txt.gz")
+
+
+def normalize_newlines(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def lookup(accession: str) -> Optional[Dict]:
+    with _lock:
+        cur = _db().execute(
+            "SELECT accession, cik, sha256, size, stored_size, has_document_blocks, fetched_utc, source "
+            "FROM filings WHERE accession = ?",
+            (accession,),
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    keys = ["accession", "cik", "sha256", "size", "stored_size", "has_document_blocks", "fetched_utc", "source"]
+    return dict(zip(keys, row))
+
+
+def read_blob(sha256: str) -> Optional[str]:
+    path = blob_path(sha256)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="ignore")
+
+
+def entries(with_document_blocks: bool = True) -> List[Dict]:
+    """Index entries (cik, accession, ...) in accession order."""
+    sql = "SELECT accession, cik FROM filings"
+    if with_document_blocks:
+        sql += " WHERE has_document_blocks = 1"
+    with _lock:
+        rows = _db().execute(sql + " ORDER BY accession").fetchall()
+    return [{"accession": a, "cik": c} for a, c in rows]
+
+
+def put(cik10: str, accession: str, text: str, source: str = "http") -> Dict:
+    """
+    Store one filing and index it. Identical content shares a blob.
+    """
+    text = normalize_newlines(text)
+    raw = text.encode("utf-8", errors="ignore")
+    sha = hashlib.sha256(raw).hexdigest()
+    path = blob_path(sha)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0))
+        os.replace(tmp, path)
+
+    entry = {
+        "accession": accession,
+        "cik": str(cik10),
+        "sha256": sha,
+        "size": len(raw),
+        "stored_size": os.path.getsize(path),
+        "has_document_blocks": 1 if "<DOCUMENT>" in text else 0,
+        "fetched_utc": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "source": source,
+    }
+    with _lock:
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            tuple(entry.values()),
+        )
+        conn.commit()
+    return entry
+
+
+def _import_legacy(cik10: str, accession: str) -> Optional[str]:
+    for d in LEGACY_DIRS:
+        path = os.path.join(d, cik_int(cik10), f"{accession}.txt")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            entry = put(cik10, accession, text, source=f"legacy:{d}")
+            if entry["has_document_blocks"]:
+                return text
+    return None
+
+
+def get_cached(cik10: str, accession: str) -> Optional[str]:
+    """
+    Cached filing text (shared store first, then the legacy caches), or None. Never downloads.
+    """
+    entry = lookup(accession)
+    if entry is not None:
+        text = read_blob(entry["sha256"])
+        if text is not None:
+            return text
+    return _import_legacy(cik10, accession)
+
+
+def ensure_cached(cik10: str, accession: str) -> Dict:
+    """
+    Index entry for a filing, downloading (and caching) it on a miss.
+    Entries without <DOCUMENT> blocks (SEC error/rate-limit pages served with 200)
+    are re-downloaded instead of being trusted forever.
+    """
+    entry = lookup(accession)
+    if entry is None or not os.path.exists(blob_path(entry["sha256"])):
+        if _import_legacy(cik10, accession) is not None:
+            return lookup(accession)
+    elif entry["has_document_blocks"]:
+        return entry
+
+    txt = sec_client.get_text(filing_txt_url(cik10, accession))
+    return put(cik10, accession, txt)
+
+
+def open_text(entry: Dict) -> io.TextIOWrapper:
+    """Stream a cached filing's text without loading it whole (newlines untouched)."""
+    raw = gzip.open(blob_path(entry["sha256"]), "rb")
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="ignore", newline="")
+
+
+def get_filing_txt(cik10: str, accession: str) -> str:
+    """Whole filing text from the cache, downloading it on a miss."""
+    with open_text(ensure_cached(cik10, accession)) as f:
+        return f.read()
+
+
+def migrate_legacy() -> int:
+    """Import every file from the legacy plain-text caches. Returns the number imported."""
+    n = 0
+    for d in LEGACY_DIRS:
+        if not os.path.isdir(d):
+            continue
+        for cik in sorted(os.listdir(d)):
+            sub = os.path.join(d, cik)
+            if not os.path.isdir(sub):
+                continue
+            for fn in sorted(os.listdir(sub)):
+                if not fn.endswith(".txt"):
+                    continue
+                accession = fn[:-4]
+                if lookup(accession) is not None:
+                    continue
+                path = os.path.join(sub, fn)
+                if os.path.getsize(path) == 0:
+                    continue
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    put(cik.zfill(10), accession, f.read(), source=f"legacy:{d}")
+                n += 1
+    return n
+
+
+def stats() -> Dict:
+    with _lock:
+        row = _db().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(has_document_blocks), 0) FROM filings"
+        ).fetchone()
+        blobs = _db().execute("SELECT COUNT(DISTINCT sha256), COALESCE(SUM(stored_size), 0) FROM "
+                              "(SELECT sha256, MAX(stored_size) AS stored_size FROM filings GROUP BY sha256)").fetchone()
+    return {
+        "filings": row[0],
+        "with_document_blocks": row[2],
+        "bytes": row[1],
+        "blobs": blobs[0],
+        "stored_bytes": blobs[1],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Shared EDGAR filing cache")
+    ap.add_argument("--migrate", action="store_true", help="import the legacy plain-text caches")
+    args = ap.parse_args(argv)
+
+    if args.migrate:
+        print(f"Imported {migrate_legacy()} legacy filings into {CACHE_DIR}")
+
+    s = stats()
+    ratio = (s["bytes"] / s["stored_bytes"]) if s["stored_bytes"] else 0.0
+    print(
+        f"{CACHE_DIR}: filings={s['filings']} with_document_blocks={s['with_document_blocks']} "
+        f"blobs={s['blobs']} text={s['bytes']/1e6:.1f}MB stored={s['stored_bytes']/1e6:.1f}MB ({ratio:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# filing_docs.py — Parse-once store of EDGAR submission documents
+#
+# parse_documents + strip_html (four regex passes over every document body) used to run in
+# both the event and the calendar stage for the same filings. The first stage to parse a
+# filing now saves its (doc_type, stripped_text) list next to the filing cache; later stages
+# and later runs load it instead of re-stripping HTML.
+#
+# Layout:
+#   data/cache/sec_parsed/ab/<sha256>.json.gz   keyed by the filing blob's content hash,
+#                                               so a re-downloaded filing is re-parsed
+#
+# Filings are streamed from the cache in chunks (iter_documents); only documents a stage can
+# use (is_candidate) are kept and stored, so base64 GRAPHIC/ZIP and XBRL bodies are never
+# held in memory. doc_count still counts every document with a body.
+#
+# Bump PARSER_VERSION whenever parse_documents/strip_html output or the stored layout changes.
+#
+# Env vars:
+#   SEC_PARSED_DIR -> store root (default data/cache/sec_parsed)
+
+import os
+import io
+import re
+import gzip
+import json
+import threading
+from typing import List, Tuple, Optional
+
+import filing_cache
+
+PARSED_DIR = os.getenv("SEC_PARSED_DIR", "data/cache/sec_parsed")
+PARSER_VERSION = 2
+
+
+def strip_html(x: str) -> str:
+    # Good enough for keyword scanning
+    x = re.sub(r"(?is)<script.*?>.*?</script>", " ", x)
+    x = re.sub(r"(?is)<style.*?>.*?</style>", " ", x)
+    x = re.sub(r"(?s)<.*?>", " ", x)
+    x = re.sub(r"\s+", " ", x)
+    return x.strip()
+
+
+def doc_score(dtype: str) -> int:
+    """
+    Relaxed matching:
+    - EX-99.1, EX-99.01 etc count
+    - 8-K/A counts as 8-K
+    """
+    t = (dtype or "").upper().strip()
+    if t.startswith("EX-99") or t.startswith("EX99"):
+        return 100
+    if re.match(r"^99(\.\d+)?", t):
+        return 90
+    if t.startswith("8-K"):
+        return 80
+    if t.startswith("10-Q"):
+        return 70
+    if t.startswith("10-K"):
+        return 65
+    return 0
+
+
+def is_candidate(dtype: str) -> bool:
+    # Documents either stage may scan. The calendar's doc_priority() > 0 set is a subset,
+    # so GRAPHIC, ZIP, XML, EX-101.* etc. are never needed.
+    return doc_score(dtype) > 0
+
+
+# -----------------------------
+# STREAMING PARSER
+# -----------------------------
+# Same result as splitting the whole file on "<DOCUMENT>" and running
+#   (?im)^<TYPE>(.+)$   and   (?is)<TEXT>(.*)</TEXT>
+# on each part, but reads the file in chunks and only keeps the bodies of wanted documents.
+CHUNK_CHARS = 1 << 16
+
+DOC_MARK = "<DOCUMENT>"
+TYPE_LINE = re.compile(r"(?im)^<TYPE>(.+)$")
+TEXT_OPEN = re.compile(r"(?i)<TEXT>")
+TEXT_CLOSE = re.compile(r"(?i)</TEXT>")
+TEXT_BODY = re.compile(r"(?is)(.*)</TEXT>")  # applied after the first <TEXT>: greedy to the last </TEXT>
+
+
+def _pieces(f, chunk: int):
+    """Yield the file's text in pieces, with None wherever a <DOCUMENT> marker was."""
+    keep = len(DOC_MARK) - 1
+    carry = ""
+    while True:
+        buf = f.read(chunk)
+        if not buf:
+            break
+        buf = carry + buf
+        start = 0
+        while True:
+            k = buf.find(DOC_MARK, start)
+            if k < 0:
+                break
+            if k > start:
+                yield buf[start:k]
+            yield None
+            start = k + len(DOC_MARK)
+        # hold back a tail that could be the start of a marker split across reads
+        cut = max(start, len(buf) - keep)
+        if cut > start:
+            yield buf[start:cut]
+        carry = buf[cut:]
+    if carry:
+        yield carry
+
+
+class _Part:
+    """
+    One <DOCUMENT> part. Modes:
+      head  -> before <TEXT>; header lines are kept to find <TYPE>
+      keep  -> wanted type; body kept
+      skip  -> unwanted type; body only scanned for a non-empty </TEXT>
+      whole -> type not settled before <TEXT>; whole part kept and parsed the old way
+    """
+    def __init__(self, want):
+        self.want = want
+        self.mode = "head"
+        self.buf = []
+        self.tail = ""
+        self.dtype = ""
+        self.body_len = 0
+        self.nonempty = False
+
+    def feed(self, piece: str):
+        if self.mode == "head":
+            s = self.tail + piece
+            m = TEXT_OPEN.search(s)
+            self.buf.append(piece)
+            if not m:
+                self.tail = s[-(len("<TEXT>") - 1):]
+                return
+            part = "".join(self.buf)
+            i = len(part) - len(s) + m.start()
+            head, rest = part[:i], part[i + len("<TEXT>"):]
+            self.buf, self.tail = [], ""
+
+            mt = TYPE_LINE.search(head)
+            if not mt or mt.end() >= len(head):
+                # <TYPE> missing or on the <TEXT> line: can't decide before seeing the whole part
+                self.mode = "whole"
+                self.buf = [part]
+                return
+            self.dtype = mt.group(1).strip()
+            self.mode = "keep" if (self.want is None or self.want(self.dtype)) else "skip"
+            self.feed(rest)
+        elif self.mode in ("keep", "whole"):
+            self.buf.append(piece)
+        elif not self.nonempty:
+            s = self.tail + piece
+            for m in TEXT_CLOSE.finditer(s):
+                if self.body_len - len(self.tail) + m.start() > 0:
+                    self.nonempty = True
+                    break
+            self.body_len += len(piece)
+            self.tail = s[-(len("</TEXT>") - 1):]
+
+    def finish(self):
+        """Returns (counted, doc_or_None)."""
+        if self.mode == "head":
+            return False, None
+        if self.mode == "skip":
+            return self.nonempty, None
+        if self.mode == "keep":
+            m = TEXT_BODY.match("".join(self.buf))
+            body = m.group(1) if m else ""
+            return bool(body), ((self.dtype, strip_html(body)) if body else None)
+        p = "".join(self.buf)
+        mtype = TYPE_LINE.search(p)
+        mtext = re.search(r"(?is)<TEXT>(.*)</TEXT>", p)
+        dtype = (mtype.group(1).strip() if mtype else "")
+        body = (mtext.group(1) if mtext else "")
+        if not body:
+            return False, None
+        if self.want is not None and not self.want(dtype):
+            return True, None
+        return True, (dtype, strip_html(body))
+
+
+def iter_documents(f, want=None, counts: Optional[dict] = None, chunk: int = CHUNK_CHARS):
+    """
+    Stream (doc_type, stripped_text) from a submission file object, one document at a time.
+    Documents whose type fails `want` are counted but their bodies are never materialized.
+    If given, `counts` gets has_document_blocks and doc_count (documents with a non-empty body).
+    """
+    if counts is None:
+        counts = {}
+    counts["has_document_blocks"] = 0
+    counts["doc_count"] = 0
+    part = None  # None = preamble before the first <DOCUMENT>
+    for piece in _pieces(f, chunk):
+        if piece is None:
+            if part is not None:
+                counted, doc = part.finish()
+                counts["doc_count"] += int(counted)
+                if doc is not None:
+                    yield doc
+            counts["has_document_blocks"] = 1
+            part = _Part(want)
+        elif part is not None:
+            part.feed(piece)
+    if part is not None:
+        counted, doc = part.finish()
+        counts["doc_count"] += int(counted)
+        if doc is not None:
+            yield doc
+
+
+def parse_documents(filing_txt: str) -> List[Tuple[str, str]]:
+    """
+    Extract (doc_type, text_content) from <DOCUMENT> blocks.
+    Requires <DOCUMENT> blocks; if missing, this wasn't a real submission file.
+    """
+    return list(iter_documents(io.StringIO(filing_txt)))
+
+
+# -----------------------------
+# PARSED DOCUMENT STORE
+# -----------------------------
+def parsed_path(sha256: str) -> str:
+    return os.path.join(PARSED_DIR, sha256[:2], f"{sha256}.json.gz")
+
+
+def load_parsed(accession: str) -> Optional[Tuple[int, List[Tuple[str, str]]]]:
+    """
+    (doc_count, candidate documents) for a cached filing, or None (not cached, no document
+    blocks, never parsed, or parsed by an older PARSER_VERSION).
+    """
+    entry = filing_cache.lookup(accession)
+    if entry is None or not entry["has_document_blocks"]:
+        return None
+    path = parsed_path(entry["sha256"])
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+    except Exception:
+        return None
+    if data.get("version") != PARSER_VERSION:
+        return None
+    return int(data.get("doc_count", 0)), [(dt, tx) for dt, tx in data.get("docs", [])]
+
+
+def store_parsed(entry: dict, doc_count: int, docs: List[Tuple[str, str]]) -> None:
+    path = parsed_path(entry["sha256"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    raw = json.dumps({"version": PARSER_VERSION, "doc_count": doc_count, "docs": docs},
+                     ensure_ascii=False).encode("utf-8")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(gzip.compress(raw, compresslevel=filing_cache.GZIP_LEVEL, mtime=0))
+    os.replace(tmp, path)
+
+
+def get_documents(cik10: str, accession: str) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    (doc_count, candidate documents) for a filing: from the store when available, otherwise
+    streamed from the filing cache (downloading on a miss) and stored for next time.
+    doc_count counts every document with a body, candidate or not.
+    """
+    parsed = load_parsed(accession)
+    if parsed is not None:
+        return parsed
+    return parse_cached(filing_cache.ensure_cached(cik10, accession))
+
+
+def parse_cached(entry: dict) -> Tuple[int, List[Tuple[str, str]]]:
+    """Stream-parse a cached filing (filing_cache index entry) and store the result."""
+    if not entry["has_document_blocks"]:
+        return 0, []
+    counts = {}
+    with filing_cache.open_text(entry) as f:
+        docs = list(iter_documents(f, want=is_candidate, counts=counts))
+    store_parsed(entry, counts["doc_count"], docs)
+    return counts["doc_count"], docs
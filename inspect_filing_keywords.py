@@ -1,8 +1,9 @@
 # inspect_filing_keywords.py
-import os, re
+import re
 import pandas as pd
 
-CACHE_DIR = "data/cache/sec_filing_txt_for_events"  # same as extractor cache
+import filing_cache  # same store the extractors fill
+
 LOG = "out/sec_scan_log.csv"
 
 KEYWORDS = [
@@ -12,19 +13,16 @@ KEYWORDS = [
     "collaboration","license","Regulation FD","conference","presentation"
 ]
 
-def cik_int(cik10): return str(int(str(cik10)))
-
 def main():
     df = pd.read_csv(LOG, dtype=str).fillna("")
     for _, r in df.iterrows():
         ticker = r["ticker"]
         cik = r["cik"]
         acc = r["accessionNumber"]
-        path = os.path.join(CACHE_DIR, cik_int(cik), f"{acc}.txt")
-        if not os.path.exists(path):
-            print(ticker, "missing cache", path)
+        text = filing_cache.get_cached(cik, acc)
+        if text is None:
+            print(ticker, "missing cache", acc)
             continue
-        text = open(path, "r", encoding="utf-8", errors="ignore").read()
         # quick normalize
         t = re.sub(r"\s+", " ", text).upper()
         hits = []
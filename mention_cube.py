@@ -0,0 +1,189 @@
+# mention_cube.py — Hourly pre-aggregated mentions: (ticker, hour, intents, domain) -> count, score
+#
+# trend_v2.py, rank_watchlist.py and alerts.py each used to re-derive mention counts from the raw
+# mention rows. New mentions are now scored once, when rss_ingest.py appends them to the mentions
+# store (trend_v2.update_cube), and added to hourly buckets here; all three read window sums
+# from the buckets, so any window (3h, 24h, 7d, 30d) is one small query.
+#
+# Scores decay as 0.5 ** (age_hours / half-life), so a mention's score at any later time is its
+# score at a fixed reference time times a factor that depends only on the time elapsed since then.
+# Each bucket keeps its score as of the start of its hour; at query time its decayed score is
+#     score * 0.5 ** ((now - hour) / half-life)
+# which is exactly the sum of the per-mention decayed scores. Windows add whole buckets, so
+# window edges are hour-aligned.
+#
+# data/cache/mention_cube.sqlite:
+#   buckets  (ticker, hour, intents, domain) -> mentions, score
+#            hour = whole hours since the Unix epoch (UTC); intents = the set of intents the
+#            title matched, "CRL;PDUFA" (one row per mention, so counts add up)
+#   best     (ticker, hour) -> highest-scoring mention of that hour (best_key, source, title, url);
+#            best_key = log2(score at its own time) + its time in hours / half-life, so the best
+#            mention of any set of hours is the one with the largest key, whatever `now` is
+#   seen     (mention_key, ticker) -> hour, mentions already folded in
+#   meta     key -> value: scoring parameters the buckets were built with, read watermark
+#
+# Rows older than CUBE_DAYS are dropped on every update. When the scoring parameters change
+# the cube is emptied and rebuilt by the next update.
+#
+# Env vars:
+#   MENTION_CUBE_PATH -> sqlite file (default data/cache/mention_cube.sqlite)
+#   MENTION_CUBE_DAYS -> hours kept, in days (default 30)
+
+import os
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+CUBE_PATH = os.getenv("MENTION_CUBE_PATH", "data/cache/mention_cube.sqlite")
+CUBE_DAYS = int(os.getenv("MENTION_CUBE_DAYS", "30"))
+
+NS_PER_HOUR = 3600 * 10**9
+
+
+def connect(params: dict, rebuild: bool = False) -> tuple:
+    """
+    Open the cube for updating. If it was built with different params (or rebuild is set) it
+    is emptied. Returns (conn, empty) where empty means the caller has to fold in everything.
+    """
+    d = os.path.dirname(CUBE_PATH)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    conn = sqlite3.connect(CUBE_PATH, timeout=60)
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS buckets (ticker TEXT, hour INTEGER, intents TEXT, domain TEXT, "
+        "mentions INTEGER, score REAL, PRIMARY KEY (ticker, hour, intents, domain));"
+        "CREATE TABLE IF NOT EXISTS best (ticker TEXT, hour INTEGER, best_key REAL, source TEXT, "
+        "title TEXT, url TEXT, PRIMARY KEY (ticker, hour));"
+        "CREATE TABLE IF NOT EXISTS seen (mention_key TEXT, ticker TEXT, hour INTEGER, "
+        "PRIMARY KEY (mention_key, ticker));"
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+    )
+    fingerprint = json.dumps(dict(params, cube_days=CUBE_DAYS), sort_keys=True)
+    if rebuild or get_meta(conn, "params") != fingerprint:
+        conn.executescript("DELETE FROM buckets; DELETE FROM best; DELETE FROM seen; DELETE FROM meta;")
+        set_meta(conn, "params", fingerprint)
+        conn.commit()
+        return conn, True
+    return conn, False
+
+
+def get_meta(conn: sqlite3.Connection, key: str, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value):
+    conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+
+def hours(ts: pd.Series) -> np.ndarray:
+    """UTC timestamps -> float hours since the epoch."""
+    return ts.to_numpy(dtype="datetime64[ns]").astype(np.int64) / NS_PER_HOUR
+
+
+def hour_of(ts) -> int:
+    """The whole hour (since the epoch) a timestamp falls in."""
+    return int(np.floor(hours(pd.Series([pd.Timestamp(ts)]))[0]))
+
+
+def hour_start(hour: int) -> pd.Timestamp:
+    return pd.Timestamp(int(hour) * NS_PER_HOUR, tz="UTC")
+
+
+def unseen(conn: sqlite3.Connection, keys: pd.Series, tickers: pd.Series) -> pd.Series:
+    """True for (mention_key, ticker) pairs not folded in yet (first of any repeats in the input)."""
+    keys = keys.astype(str)
+    pairs = keys + "\x1f" + tickers.astype(str)
+    known = set()
+    ids = keys.unique().tolist()
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        q = "SELECT mention_key, ticker FROM seen WHERE mention_key IN (%s)" % ",".join("?" * len(chunk))
+        known.update(f"{k}\x1f{t}" for k, t in conn.execute(q, chunk))
+    return ~pairs.isin(known) & ~pairs.duplicated()
+
+
+def fold(conn: sqlite3.Connection, rows: pd.DataFrame, half_life: float):
+    """
+    Add mentions to the buckets. rows: key, ticker, ts (UTC), score (weight at ts), intents,
+    domain, source, title, url. Nothing is committed; the caller commits with its watermark.
+    """
+    if rows.empty:
+        return
+    t = hours(rows["ts"])
+    df = rows.assign(hour=np.floor(t).astype(np.int64))
+    df["ref_score"] = df["score"].to_numpy() * np.power(2.0, (t - df["hour"].to_numpy()) / half_life)
+    df["key_score"] = np.log2(df["score"].to_numpy()) + t / half_life
+
+    b = df.groupby(["ticker", "hour", "intents", "domain"], as_index=False, sort=False).agg(
+        mentions=("ticker", "size"), score=("ref_score", "sum"))
+    conn.executemany(
+        "INSERT INTO buckets VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ticker, hour, intents, domain) "
+        "DO UPDATE SET mentions = mentions + excluded.mentions, score = score + excluded.score",
+        list(zip(b["ticker"], b["hour"].astype(int), b["intents"], b["domain"],
+                 b["mentions"].astype(int), b["score"].astype(float))),
+    )
+
+    top = df.loc[df.groupby(["ticker", "hour"], sort=False)["key_score"].idxmax()]
+    conn.executemany(
+        "INSERT INTO best VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ticker, hour) DO UPDATE SET "
+        "best_key = excluded.best_key, source = excluded.source, title = excluded.title, "
+        "url = excluded.url WHERE excluded.best_key > best.best_key",
+        list(zip(top["ticker"], top["hour"].astype(int), top["key_score"].astype(float),
+                 top["source"], top["title"], top["url"])),
+    )
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO seen VALUES (?, ?, ?)",
+        list(zip(df["key"].astype(str), df["ticker"], df["hour"].astype(int))),
+    )
+
+
+def prune(conn: sqlite3.Connection, first_hour: int):
+    for table in ("buckets", "best", "seen"):
+        conn.execute(f"DELETE FROM {table} WHERE hour < ?", (int(first_hour),))
+
+
+def available() -> bool:
+    if not os.path.exists(CUBE_PATH):
+        return False
+    conn = sqlite3.connect(CUBE_PATH, timeout=60)
+    try:
+        return conn.execute("SELECT 1 FROM buckets LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def counts(windows: dict, now=None) -> pd.DataFrame:
+    """
+    Mentions per ticker over trailing windows, e.g. {"mentions_24h": 24, "mentions_7d": 168}
+    (hours; the window starts at the beginning of the hour that many hours before now).
+    Returns ticker + one int column per window; tickers with no mentions are absent.
+    """
+    now_hour = hour_of(now if now is not None else pd.Timestamp.now(tz="UTC"))
+    cols = ", ".join(f"SUM(CASE WHEN hour >= {now_hour - int(h)} THEN mentions ELSE 0 END) AS {name}"
+                     for name, h in windows.items())
+    return _read(f"SELECT ticker, {cols} FROM buckets WHERE hour >= ? GROUP BY ticker ORDER BY ticker",
+                 (now_hour - max(int(h) for h in windows.values()),))
+
+
+def _read(query: str, params: tuple) -> pd.DataFrame:
+    conn = sqlite3.connect(CUBE_PATH, timeout=60)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def buckets(first_hour: int) -> pd.DataFrame:
+    return _read("SELECT ticker, hour, intents, domain, mentions, score FROM buckets WHERE hour >= ? "
+                 "ORDER BY ticker, hour", (int(first_hour),))
+
+
+def best(first_hour: int) -> pd.DataFrame:
+    return _read("SELECT ticker, hour, best_key, source, title, url FROM best WHERE hour >= ? "
+                 "ORDER BY ticker, hour", (int(first_hour),))
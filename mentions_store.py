@@ -0,0 +1,247 @@
+# mentions_store.py — Append-only, de-duplicated store of RSS mentions
+#
+# rss_ingest.py used to overwrite out/mentions.csv with whatever the feeds still carried, so
+# anything older than a feed's window was lost. Mentions are now appended here and kept.
+#
+# Layout:
+#   data/mentions/day=YYYY-MM-DD/part-<utc>-<pid>.csv   rows appended by one ingest run
+#   data/mentions/day=YYYY-MM-DD/mentions.csv           a compacted day (parts merged)
+#   data/mentions/keys.sqlite                           (mention_id, ticker) -> day
+#
+# Rows are partitioned by the UTC day of created_at_utc (rows without a usable timestamp go
+# to the day they were ingested). The key index makes append() write only rows never seen
+# before, so re-ingesting the same feed items costs nothing. Readers ask for a time range and
+# only the matching day partitions are read.
+#
+# One writer at a time (the ingest run or `python mentions_store.py --compact`).
+#
+# Env vars:
+#   MENTIONS_STORE_DIR -> store root (default data/mentions)
+
+import os
+import glob
+import sqlite3
+import argparse
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+import pandas as pd
+
+STORE_DIR = os.getenv("MENTIONS_STORE_DIR", "data/mentions")
+KEYS_PATH = os.path.join(STORE_DIR, "keys.sqlite")
+COMPACT_NAME = "mentions.csv"
+
+COLUMNS = ["mention_id", "ticker", "matched_by", "source", "feed", "created_at_utc", "title", "link"]
+KEY = ["mention_id", "ticker"]
+
+
+def _db() -> sqlite3.Connection:
+    os.makedirs(STORE_DIR, exist_ok=True)
+    conn = sqlite3.connect(KEYS_PATH, timeout=60)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS keys (mention_id TEXT, ticker TEXT, day TEXT, "
+        "PRIMARY KEY (mention_id, ticker))"
+    )
+    return conn
+
+
+def day_dir(day: str) -> str:
+    return os.path.join(STORE_DIR, f"day={day}")
+
+
+def days() -> list:
+    """Partition days present in the store, oldest first."""
+    out = []
+    for d in glob.glob(os.path.join(STORE_DIR, "day=*")):
+        if os.path.isdir(d):
+            out.append(os.path.basename(d)[len("day="):])
+    return sorted(out)
+
+
+def _utc(x) -> pd.Timestamp:
+    t = pd.Timestamp(x)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+
+def _to_day(x) -> Optional[str]:
+    return None if x is None else _utc(x).date().isoformat()
+
+
+def _write_csv(df: pd.DataFrame, path: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def append(rows: pd.DataFrame) -> int:
+    """
+    Add mention rows (COLUMNS; missing columns are blank). Rows whose (mention_id, ticker) is
+    already stored, or repeated within `rows`, are dropped; the first occurrence wins.
+    Returns the number of rows written.
+    """
+    if rows is None or rows.empty:
+        return 0
+    df = rows.copy()
+    for c in COLUMNS:
+        if c not in df.columns:
+            df[c] = ""
+    df = df[COLUMNS].astype(str).drop_duplicates(subset=KEY, keep="first")
+
+    ts = pd.to_datetime(df["created_at_utc"], errors="coerce", utc=True)
+    today = datetime.now(timezone.utc).date().isoformat()
+    df["_day"] = ts.dt.strftime("%Y-%m-%d").where(ts.notna(), today)
+
+    conn = _db()
+    try:
+        known = set()
+        ids = df["mention_id"].unique().tolist()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            q = "SELECT mention_id, ticker FROM keys WHERE mention_id IN (%s)" % ",".join("?" * len(chunk))
+            known.update(conn.execute(q, chunk).fetchall())
+        is_new = [k not in known for k in zip(df["mention_id"], df["ticker"])]
+        new = df[is_new]
+        if new.empty:
+            return 0
+
+        # files first, then keys: a crash in between can only leave duplicates, which
+        # read() and compact() drop, never lose rows
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        for day, g in new.groupby("_day", sort=True):
+            os.makedirs(day_dir(day), exist_ok=True)
+            _write_csv(g[COLUMNS], os.path.join(day_dir(day), f"part-{stamp}-{os.getpid()}.csv"))
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO keys VALUES (?, ?, ?)",
+            list(zip(new["mention_id"], new["ticker"], new["_day"])),
+        )
+        conn.commit()
+        return len(new)
+    finally:
+        conn.close()
+
+
+def _day_files(day: str) -> list:
+    d = day_dir(day)
+    files = sorted(glob.glob(os.path.join(d, "part-*.csv")))
+    compacted = os.path.join(d, COMPACT_NAME)
+    if os.path.exists(compacted):
+        files.insert(0, compacted)  # older than any part written after compaction
+    return files
+
+
+def _read_files(files: list) -> pd.DataFrame:
+    frames = [pd.read_csv(f, dtype=str).fillna("") for f in files if os.path.getsize(f) > 0]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read(start=None, end=None) -> pd.DataFrame:
+    """
+    Mentions with start <= created_at_utc < end (datetimes, dates or ISO strings; None = open).
+    Only the day partitions overlapping the range are read. Rows without a usable timestamp
+    are kept if their partition is in range.
+    """
+    d0, d1 = _to_day(start), _to_day(end)
+    files = []
+    for day in days():
+        if (d0 and day < d0) or (d1 and day > d1):
+            continue
+        files.extend(_day_files(day))
+    df = _read_files(files)
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    df = df.drop_duplicates(subset=KEY, keep="first")
+
+    ts = pd.to_datetime(df["created_at_utc"], errors="coerce", utc=True)
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= ts.isna() | ts.ge(_utc(start))
+    if end is not None:
+        keep &= ts.isna() | ts.lt(_utc(end))
+    return df[keep].reset_index(drop=True)
+
+
+def read_recent(days_back: float) -> pd.DataFrame:
+    return read(start=datetime.now(timezone.utc) - timedelta(days=days_back))
+
+
+def read_changed(since: float, start=None) -> pd.DataFrame:
+    """
+    Rows from day files written at or after `since` (epoch seconds), in partitions from the
+    day of `start` on. Compacted files are re-read whole, so rows can repeat across calls;
+    callers that keep their own state de-duplicate on KEY.
+    """
+    d0 = _to_day(start)
+    files = []
+    for day in days():
+        if d0 and day < d0:
+            continue
+        files.extend(f for f in _day_files(day) if os.path.getmtime(f) >= since)
+    df = _read_files(files)
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    return df.drop_duplicates(subset=KEY, keep="first").reset_index(drop=True)
+
+
+def compact(keep_today: bool = True) -> int:
+    """
+    Merge each day's part files (and any earlier compacted file) into one de-duplicated
+    mentions.csv sorted by created_at_utc. Today's partition is left alone unless
+    keep_today is False, since it is still being appended to. Returns days compacted.
+    """
+    today = datetime.now(timezone.utc).date().isoformat()
+    n = 0
+    for day in days():
+        if keep_today and day >= today:
+            continue
+        files = _day_files(day)
+        parts = [f for f in files if os.path.basename(f) != COMPACT_NAME]
+        if not parts:
+            continue
+        df = _read_files(files).drop_duplicates(subset=KEY, keep="first")
+        df = df.sort_values("created_at_utc", kind="mergesort")
+        _write_csv(df, os.path.join(day_dir(day), COMPACT_NAME))
+        for f in parts:
+            os.remove(f)
+        n += 1
+    return n
+
+
+def stats() -> dict:
+    ds = days()
+    files = [f for d in ds for f in _day_files(d)]
+    conn = _db()
+    try:
+        n_keys = conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        "days": len(ds),
+        "first_day": ds[0] if ds else "",
+        "last_day": ds[-1] if ds else "",
+        "files": len(files),
+        "mentions": n_keys,
+        "bytes": sum(os.path.getsize(f) for f in files),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Append-only mentions store")
+    ap.add_argument("--compact", action="store_true", help="merge part files of past days")
+    ap.add_argument("--all", action="store_true", help="with --compact: include today")
+    args = ap.parse_args(argv)
+
+    if args.compact:
+        print(f"Compacted {compact(keep_today=not args.all)} day partitions in {STORE_DIR}")
+
+    s = stats()
+    print(
+        f"{STORE_DIR}: mentions={s['mentions']} days={s['days']} ({s['first_day']}..{s['last_day']}) "
+        f"files={s['files']} size={s['bytes']/1e6:.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
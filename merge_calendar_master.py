@@ -111,10 +111,11 @@ def source_rank_val(ds: str) -> int:
 def recompute_days_to_event(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
-    today = datetime.now(timezone.utc).date()
-    dt = pd.to_datetime(df["catalyst_date"], errors="coerce").dt.date
-    df["days_to_event"] = (dt - today).apply(lambda x: x.days if pd.notna(x) else 9999)
-    df["days_to_event"] = pd.to_numeric(df["days_to_event"], errors="coerce").fillna(9999).astype(int).astype(str)
+    today = pd.Timestamp(datetime.now(timezone.utc).date())
+    dt = pd.to_datetime(df["catalyst_date"], errors="coerce")
+    if dt.dt.tz is not None:
+        dt = dt.dt.tz_localize(None)  # wall-clock date, as .dt.date gives
+    df["days_to_event"] = (dt.dt.normalize() - today).dt.days.fillna(9999).astype(int).astype(str)
     return df
 
 def drop_past(df: pd.DataFrame) -> pd.DataFrame:
@@ -167,14 +168,12 @@ def prefer_best_per_key(df: pd.DataFrame) -> pd.DataFrame:
         ascending=[True, False, False, False, False, False, False, False],
     )
 
-    # Preserve earliest first_seen_utc across duplicates
-    first_seen_map = (
-        df.groupby(KEY_COLS, dropna=False)["first_seen_utc"]
-        .apply(lambda s: sorted([x for x in s if str(x).strip()])[:1][0] if any(str(x).strip() for x in s) else "")
-    )
+    # Preserve earliest first_seen_utc across duplicates (blank values ignored)
+    fs = df["first_seen_utc"].astype(str)
+    fs = fs.where(fs.str.strip() != "")
+    df["first_seen_utc"] = fs.groupby([df[c] for c in KEY_COLS], dropna=False).transform("min").fillna("")
 
     df = df.drop_duplicates(subset=KEY_COLS, keep="first").copy()
-    df["first_seen_utc"] = df.apply(lambda r: first_seen_map.get(tuple(r[c] for c in KEY_COLS), r["first_seen_utc"]), axis=1)
 
     # cleanup helpers
     for c in ["_approx_int","_src_rank","_filing_dt","_mention_dt","_has_url","_ctx_len","_last_seen","_conf"]:
@@ -201,9 +200,11 @@ def drop_approx_if_exact_exists(df: pd.DataFrame) -> pd.DataFrame:
         d.drop(columns=["_approx_int"], inplace=True)
         return d
 
-    exact_dates = exact[["ticker","event_type","catalyst_date"]].copy()
+    exact_dates = exact[["ticker","event_type","catalyst_date"]].astype(str)
     exact_dates["_exact_dt"] = pd.to_datetime(exact_dates["catalyst_date"], errors="coerce").dt.date
-    exact_pairs = set(exact_dates[["ticker","event_type"]].astype(str).apply(tuple, axis=1).tolist())
+    pairs = pd.MultiIndex.from_frame(d[["ticker","event_type"]].astype(str))
+    is_approx = d["_approx_int"].eq(1).to_numpy()
+    in_exact_pair = pairs.isin(pd.MultiIndex.from_frame(exact_dates[["ticker","event_type"]]))
 
     # If we can parse window start/end, do window containment
     has_window = all(c in d.columns for c in WINDOW_COLS)
@@ -211,32 +212,21 @@ def drop_approx_if_exact_exists(df: pd.DataFrame) -> pd.DataFrame:
         d["_ws"] = pd.to_datetime(d["catalyst_window_start"], errors="coerce").dt.date
         d["_we"] = pd.to_datetime(d["catalyst_window_end"], errors="coerce").dt.date
 
-        # Build a lookup for exact dates per pair
-        pair_to_dates = {}
-        for _, r in exact_dates.iterrows():
-            pair = (str(r["ticker"]), str(r["event_type"]))
-            dt0 = r["_exact_dt"]
-            if pd.notna(dt0):
-                pair_to_dates.setdefault(pair, []).append(dt0)
-
-        def should_drop(row):
-            pair = (str(row["ticker"]), str(row["event_type"]))
-            if pair not in exact_pairs:
-                return False
-            if int(row["_approx_int"]) != 1:
-                return False
-            ws, we = row["_ws"], row["_we"]
-            # if no window, drop (fallback)
-            if pd.isna(ws) or pd.isna(we):
-                return True
-            # drop only if any exact date falls within [ws,we]
-            for dt0 in pair_to_dates.get(pair, []):
-                if ws <= dt0 <= we:
-                    return True
-            # if exact exists but not in window, keep (could be different program)
-            return False
-
-        mask = d.apply(should_drop, axis=1)
+        cand = in_exact_pair & is_approx
+        # if no window, drop (fallback)
+        no_window = (d["_ws"].isna() | d["_we"].isna()).to_numpy()
+        mask = cand & no_window
+
+        # drop only if any exact date of the pair falls within [ws,we]; an exact date outside
+        # the window keeps the approx row (could be different program)
+        win = d.loc[cand & ~no_window, ["ticker","event_type","_ws","_we"]].astype({"ticker": str, "event_type": str})
+        win["_row"] = win.index
+        hits = win.merge(exact_dates.loc[exact_dates["_exact_dt"].notna(), ["ticker","event_type","_exact_dt"]],
+                         on=["ticker","event_type"])
+        if not hits.empty:
+            inside = (hits["_ws"] <= hits["_exact_dt"]) & (hits["_exact_dt"] <= hits["_we"])
+            mask |= d.index.isin(hits.loc[inside, "_row"])
+
         d = d[~mask].copy()
 
         for c in ["_ws","_we"]:
@@ -244,36 +234,21 @@ def drop_approx_if_exact_exists(df: pd.DataFrame) -> pd.DataFrame:
                 d.drop(columns=[c], inplace=True)
     else:
         # Simple rule: exact exists => drop all approx for that pair
-        mask = d.apply(lambda r: (str(r["ticker"]), str(r["event_type"])) in exact_pairs and int(r["_approx_int"]) == 1, axis=1)
-        d = d[~mask].copy()
+        d = d[~(in_exact_pair & is_approx)].copy()
 
     d.drop(columns=["_approx_int"], inplace=True)
     return d
 
-def main():
-    os.makedirs("out", exist_ok=True)
-
-    now_iso = datetime.now(timezone.utc).isoformat()
-
-    # Load new sources
-    parts = []
-    for p in SOURCES:
-        x = safe_read_csv(p)
-        if not x.empty:
-            parts.append(x)
-
-    new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
-
-    # Load master
-    master = safe_read_csv(MASTER_OUT)
-
-    # If everything empty, write empty master with a reasonable header
-    if new.empty and master.empty:
-        base_cols = KEY_COLS + ["days_to_event","confidence","date_source","doc_url","context"] + WINDOW_COLS + META_COLS
-        pd.DataFrame(columns=base_cols).to_csv(MASTER_OUT, index=False)
-        print(f"Wrote {MASTER_OUT} (0 rows)")
-        return
+def refresh_last_seen(combined: pd.DataFrame, new: pd.DataFrame, now_iso: str) -> pd.DataFrame:
+    """Sets last_seen_utc=now on every row whose KEY_COLS match a row in 'new'."""
+    if not new.empty:
+        new_keys = pd.MultiIndex.from_frame(new[KEY_COLS].astype(str))
+        seen_again = pd.MultiIndex.from_frame(combined[KEY_COLS].astype(str)).isin(new_keys)
+        combined.loc[seen_again, "last_seen_utc"] = now_iso
+    return combined
 
+def merge(new: pd.DataFrame, master: pd.DataFrame, now_iso: str) -> pd.DataFrame:
+    """Master calendar after merging in the new source rows (new and master not both empty)."""
     # Union schema
     all_cols = sorted(set(list(new.columns) + list(master.columns) + KEY_COLS + META_COLS + WINDOW_COLS))
     new = ensure_cols(new, all_cols)
@@ -291,12 +266,7 @@ def main():
     combined = pd.concat([master, new], ignore_index=True)
 
     # If an item appears again this run, last_seen should become now
-    # We implement this by setting last_seen=now for all rows that match any KEY in 'new'
-    if not new.empty:
-        new_keys = set(new[KEY_COLS].astype(str).apply(tuple, axis=1).tolist())
-        combined["__key__"] = combined[KEY_COLS].astype(str).apply(tuple, axis=1)
-        combined.loc[combined["__key__"].isin(new_keys), "last_seen_utc"] = now_iso
-        combined.drop(columns=["__key__"], inplace=True)
+    combined = refresh_last_seen(combined, new, now_iso)
 
     # Dedupe within identical key
     combined = prefer_best_per_key(combined)
@@ -311,8 +281,33 @@ def main():
     # Final sort: soonest first, then confidence
     combined["_days"] = pd.to_numeric(combined["days_to_event"], errors="coerce").fillna(9999).astype(int)
     combined["_conf2"] = pd.to_numeric(combined.get("confidence",""), errors="coerce").fillna(0.0)
-    combined = combined.sort_values(["_days","_conf2"], ascending=[True, False]).drop(columns=["_days","_conf2"])
+    return combined.sort_values(["_days","_conf2"], ascending=[True, False]).drop(columns=["_days","_conf2"])
+
+def main():
+    os.makedirs("out", exist_ok=True)
+
+    now_iso = datetime.now(timezone.utc).isoformat()
+
+    # Load new sources
+    parts = []
+    for p in SOURCES:
+        x = safe_read_csv(p)
+        if not x.empty:
+            parts.append(x)
+
+    new = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    # Load master
+    master = safe_read_csv(MASTER_OUT)
+
+    # If everything empty, write empty master with a reasonable header
+    if new.empty and master.empty:
+        base_cols = KEY_COLS + ["days_to_event","confidence","date_source","doc_url","context"] + WINDOW_COLS + META_COLS
+        pd.DataFrame(columns=base_cols).to_csv(MASTER_OUT, index=False)
+        print(f"Wrote {MASTER_OUT} (0 rows)")
+        return
 
+    combined = merge(new, master, now_iso)
     combined.to_csv(MASTER_OUT, index=False)
     print(f"Wrote {MASTER_OUT} ({len(combined)} rows)")
 
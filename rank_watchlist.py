@@ -1,10 +1,11 @@
 # rank_watchlist.py
 import os
 import pandas as pd
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+
+import mention_cube
 
 CAL = "out/catalyst_calendar_master.csv"
-MENTIONS = "out/mentions.csv"
 OUT_TREND = "out/trend_scores.csv"
 OUT_RANK  = "out/ranked_watchlist.csv"
 
@@ -93,25 +94,6 @@ def main():
         - cal["approximate"] * 5
     )
 
-    # Trend score from mentions
-    try:
-        m = pd.read_csv(MENTIONS, dtype=str)
-    except Exception:
-        m = pd.DataFrame(columns=["ticker", "created_at_utc"])
-
-    if not m.empty:
-        m["created_at_utc"] = pd.to_datetime(m["created_at_utc"], errors="coerce", utc=True)
-        now = datetime.now(timezone.utc)
-        w24 = now - timedelta(hours=24)
-        w7d = now - timedelta(days=7)
-
-        m24 = m[m["created_at_utc"] >= w24].groupby("ticker").size().rename("mentions_24h")
-        m7  = m[m["created_at_utc"] >= w7d].groupby("ticker").size().rename("mentions_7d")
-
-        trend = pd.concat([m24, m7], axis=1).fillna(0).reset_index()
-        trend["mentions_24h"] = trend["mentions_24h"].astype(int)
-        trend["mentions_7d"] = trend["mentions_7d"].astype(int)
-
     # Trend score: 24h velocity weighted, plus baseline 7d
     try:
         trend = pd.read_csv("out/trends_v2.csv", dtype=str).fillna("")
@@ -119,6 +101,11 @@ def main():
     except Exception:
         trend = pd.DataFrame({"ticker": cal["ticker"].unique(), "trend_score": 0})
 
+    # Mention counts as of now, from the hourly mention cube (no scan of the mention rows)
+    if mention_cube.available():
+        counts = mention_cube.counts({"mentions_24h": 24, "mentions_7d": 24 * 7}).set_index("ticker")
+        for c in ["mentions_24h", "mentions_7d"]:
+            trend[c] = trend["ticker"].map(counts[c]).fillna(0).astype(int).astype(str)  # text, like the csv
 
     trend.to_csv(OUT_TREND, index=False)
 
@@ -1,9 +1,13 @@
 
-import os, re, time, hashlib
+import os, re, time, json, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import pandas as pd
 import requests
 import feedparser
-from datetime import datetime, timezone
+
+import mentions_store  # append-only history behind out/mentions.csv
+import trend_v2  # scores new mentions into the hourly mention cube
 
 USER_AGENT = "lia-biopharma/0.1 (contact: huyminhhoangtrong1101@gmail.com)"  # CHANGE THIS
 
@@ -11,6 +15,13 @@ UNIVERSE = "universe_biopharma.csv"
 CALENDAR = "out/catalyst_calendar.csv"   # we’ll prioritize names for these tickers
 OUT_MENTIONS = "out/mentions.csv"
 OUT_FEED_STATUS = "out/rss_feed_status.csv"
+EXPORT_DAYS = int(os.getenv("MENTIONS_EXPORT_DAYS", "7"))  # window of the store written to OUT_MENTIONS
+
+# Feeds are on different hosts, so they are fetched in parallel with no shared rate limit
+RSS_WORKERS = int(os.getenv("RSS_WORKERS", "8"))
+
+# Per feed: ETag/Last-Modified plus the entries parsed from the last 200, reused on 304
+FEED_CACHE_DIR = "data/cache/rss_feeds"
 
 # Biotech-focused editorial RSS (far fewer ads than PR-wire blasts)
 RSS_FEEDS = [
@@ -85,9 +96,153 @@ def build_company_aliases(name: str):
             out.append(a)
     return out
 
-def fetch_feed(url: str):
-    r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=60)
-    return r.status_code, r.text
+# -----------------------------
+# UNIVERSE MATCHER
+# -----------------------------
+# Built once per run. Bare/$ tickers are matched by splitting the upper-cased text into
+# [A-Z0-9] runs and looking each run up in the ticker set, which is what
+#   (?<![A-Z0-9])(\$TK|TK)(?![A-Z0-9])
+# amounts to for plain alphanumeric tickers. Tickers with other characters (BIO.B, AHL$D)
+# keep that exact regex, compiled once. Aliases are only tried when their longest word
+# occurs in the text as a whole word; the original \bALIAS\b search then confirms.
+TOKEN_RUN = re.compile(r"[A-Z0-9]+")
+WORD = re.compile(r"\w+")
+
+
+def build_matcher(all_tickers, name_map):
+    plain = set()
+    special = []
+    for tk in sorted(all_tickers):
+        if len(tk) < 2 or len(tk) > 5:
+            continue
+        if TOKEN_RUN.fullmatch(tk):
+            plain.add(tk)
+        else:
+            special.append((tk, re.compile(rf"(?<![A-Z0-9])(\${tk}|{tk})(?![A-Z0-9])")))
+
+    by_word = {}  # casefolded word -> [(rank, ticker, compiled alias)]
+    for rank, (tk, aliases) in enumerate(name_map.items()):
+        for a in aliases:
+            words = WORD.findall(a.casefold())
+            pat = re.compile(rf"\b{re.escape(a)}\b", flags=re.I)
+            key = max(words, key=len) if words else ""
+            by_word.setdefault(key, []).append((rank, tk, pat))
+
+    return {"all_tickers": set(all_tickers), "plain": plain, "special": special, "by_word": by_word}
+
+
+def match_entry(matcher, text: str):
+    """(ticker, matched_by) hits for one entry, before per-ticker de-dupe."""
+    up = text.upper()
+    found = []
+
+    # 1) exchange ticker patterns (NASDAQ: TVTX)
+    for m in EXCHANGE_TICKER.finditer(up):
+        tk = m.group(2).upper()
+        if tk in matcher["all_tickers"]:
+            found.append((tk, "exchange_ticker"))
+
+    # 2) $TICKER and bare-word tickers
+    # keep conservative: only tickers that are in your universe and 2-5 chars
+    plain = matcher["plain"]
+    seen = set()
+    for tok in TOKEN_RUN.findall(up):
+        if tok in plain and tok not in seen:
+            seen.add(tok)
+            found.append((tok, "ticker"))
+    for tk, pat in matcher["special"]:
+        if pat.search(up):
+            found.append((tk, "ticker"))
+
+    # 3) company name aliases (only for focus tickers with catalysts)
+    by_word = matcher["by_word"]
+    named = {}
+    words = set(WORD.findall(text.casefold()))
+    words.add("")  # aliases without word characters are always tried
+    for w in words:
+        for rank, tk, pat in by_word.get(w, ()):
+            if rank not in named and pat.search(text):
+                named[rank] = tk
+    found.extend((named[r], "name") for r in sorted(named))
+    return found
+
+
+def feed_cache_path(url: str) -> str:
+    return os.path.join(FEED_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+def load_feed_cache(url: str) -> dict:
+    path = feed_cache_path(url)
+    if not os.path.exists(path):
+        return {}
+    try:
+        return json.load(open(path, "r", encoding="utf-8"))
+    except Exception:
+        return {}
+
+def save_feed_cache(url: str, cache: dict):
+    os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+    path = feed_cache_path(url)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+def fetch_feed(url: str, cache: dict | None = None):
+    """Conditional GET when the feed was seen before: unchanged feeds answer 304 with no body."""
+    headers = {"User-Agent": USER_AGENT}
+    cache = cache or {}
+    if cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
+    r = requests.get(url, headers=headers, timeout=60)
+    return r.status_code, r.text, r.headers
+
+def feed_entries(body: str) -> list:
+    entries = []
+    parsed = feedparser.parse(body)
+    for e in parsed.entries:
+        entries.append({
+            "title": normalize(getattr(e, "title", "")),
+            "summary": normalize(getattr(e, "summary", ""))[:2000],
+            "link": getattr(e, "link", ""),
+            "created_at_utc": entry_time(e).isoformat(),
+        })
+    return entries
+
+def load_feed(url: str):
+    """
+    Fetch + parse one feed. Returns (status row, entries). A 304 reuses the entries stored
+    from the last 200, so an unchanged feed is neither downloaded nor parsed again.
+    """
+    cache = load_feed_cache(url)
+    t0 = time.perf_counter()
+    row = {"feed": url, "http_status": "ERR", "bytes": 0, "latency_s": 0.0, "not_modified": 0, "entries": 0}
+    try:
+        status, body, headers = fetch_feed(url, cache if "entries" in cache else None)
+        row["latency_s"] = round(time.perf_counter() - t0, 3)
+        row["http_status"] = status
+        row["bytes"] = len(body or "")
+
+        if status == 304:
+            entries = cache["entries"]
+            row["not_modified"] = 1
+        elif status == 200 and body:
+            entries = feed_entries(body)
+            save_feed_cache(url, {
+                "etag": headers.get("ETag", ""),
+                "last_modified": headers.get("Last-Modified", ""),
+                "fetched_utc": datetime.now(timezone.utc).isoformat(),
+                "entries": entries,
+            })
+        else:
+            entries = []
+    except Exception:
+        row["http_status"] = "ERR"
+        row["latency_s"] = round(time.perf_counter() - t0, 3)
+        entries = []
+    row["entries"] = len(entries)
+    return row, entries
 
 def normalize(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "")).strip()
@@ -119,93 +274,69 @@ def main():
         tk = r["ticker"]
         if tk in focus and r["company_name"]:
             name_map[tk] = build_company_aliases(r["company_name"])
+    matcher = build_matcher(all_tickers, name_map)
 
     mention_rows = []
     feed_status = []
 
-    for feed in RSS_FEEDS:
-        try:
-            status, body = fetch_feed(feed)
-            feed_status.append({"feed": feed, "http_status": status, "bytes": len(body or "")})
+    workers = max(1, min(RSS_WORKERS, len(RSS_FEEDS)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(load_feed, RSS_FEEDS))
+
+    for feed, (status_row, entries) in zip(RSS_FEEDS, results):
+        feed_status.append(status_row)
+
+        for e in entries:
+            title = e["title"]
+            summary = e["summary"]
+            link = e["link"]
+            text = (title + " " + summary).strip()
 
-            if status != 200 or not body:
+            if not text:
+                continue
+            if AD_WORDS.search(text):
                 continue
 
-            parsed = feedparser.parse(body)
-            for e in parsed.entries:
-                title = normalize(getattr(e, "title", ""))
-                summary = normalize(getattr(e, "summary", ""))[:2000]
-                link = getattr(e, "link", "")
-                text = (title + " " + summary).strip()
+            # stable id
+            uid = hashlib.sha1((title + "|" + link).encode("utf-8", errors="ignore")).hexdigest()
+            created = e["created_at_utc"]
 
-                if not text:
-                    continue
-                if AD_WORDS.search(text):
-                    continue
+            found = match_entry(matcher, text)
 
-                # stable id
-                uid = hashlib.sha1((title + "|" + link).encode("utf-8", errors="ignore")).hexdigest()
-                created = entry_time(e).isoformat()
-
-                found = []
-
-                # 1) exchange ticker patterns (NASDAQ: TVTX)
-                for m in EXCHANGE_TICKER.finditer(text.upper()):
-                    tk = m.group(2).upper()
-                    if tk in all_tickers:
-                        found.append((tk, "exchange_ticker"))
-
-                # 2) $TICKER and bare-word tickers
-                # keep conservative: only tickers that are in your universe and 2-5 chars
-                for tk in all_tickers:
-                    if len(tk) < 2 or len(tk) > 5:
-                        continue
-                    if re.search(rf"(?<![A-Z0-9])(\${tk}|{tk})(?![A-Z0-9])", text.upper()):
-                        found.append((tk, "ticker"))
-
-                # 3) company name aliases (only for focus tickers with catalysts)
-                for tk, aliases in name_map.items():
-                    for a in aliases:
-                        if re.search(rf"\b{re.escape(a)}\b", text, flags=re.I):
-                            found.append((tk, "name"))
-                            break
-
-                if not found:
-                    continue
+            if not found:
+                continue
 
-                # de-dupe per entry/ticker
-                seen = set()
-                for tk, how in found:
-                    key = (uid, tk)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    mention_rows.append({
-                        "mention_id": uid,
-                        "ticker": tk,
-                        "matched_by": how,
-                        "source": "rss",
-                        "feed": feed,
-                        "created_at_utc": created,
-                        "title": title[:300],
-                        "link": link,
-                    })
-
-        except Exception:
-            feed_status.append({"feed": feed, "http_status": "ERR", "bytes": 0})
-        time.sleep(0.2)
+            # de-dupe per entry/ticker
+            seen = set()
+            for tk, how in found:
+                key = (uid, tk)
+                if key in seen:
+                    continue
+                seen.add(key)
+                mention_rows.append({
+                    "mention_id": uid,
+                    "ticker": tk,
+                    "matched_by": how,
+                    "source": "rss",
+                    "feed": feed,
+                    "created_at_utc": created,
+                    "title": title[:300],
+                    "link": link,
+                })
 
     pd.DataFrame(feed_status).to_csv(OUT_FEED_STATUS, index=False)
 
-    mdf = pd.DataFrame(mention_rows)
-    if mdf.empty:
-        mdf.to_csv(OUT_MENTIONS, index=False)
-        print(f"Wrote {OUT_MENTIONS} (0 rows). Also wrote {OUT_FEED_STATUS}.")
-        return
-
+    mdf = pd.DataFrame(mention_rows, columns=mentions_store.COLUMNS)
     mdf = mdf.drop_duplicates(subset=["mention_id", "ticker", "link"]).reset_index(drop=True)
-    mdf.to_csv(OUT_MENTIONS, index=False)
-    print(f"Wrote {OUT_MENTIONS} ({len(mdf)} rows). Also wrote {OUT_FEED_STATUS}.")
+    n_new = mentions_store.append(mdf)
+    if n_new:
+        trend_v2.update_cube()
+
+    # out/mentions.csv is now the store's recent window, so history outlives the feeds
+    recent = mentions_store.read_recent(EXPORT_DAYS)
+    recent.to_csv(OUT_MENTIONS, index=False)
+    print(f"Wrote {OUT_MENTIONS} ({len(recent)} rows, last {EXPORT_DAYS}d; {n_new} new of {len(mdf)} in feeds). "
+          f"Also wrote {OUT_FEED_STATUS}.")
 
 if __name__ == "__main__":
     main()
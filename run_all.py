@@ -1,4 +1,12 @@
-import subprocess, sys
+# run_all.py — Run the whole pipeline in one process
+#
+# Stages are imported and their main() called in-process (instead of one interpreter per
+# script) so every SEC-fetching stage shares sec_client's keep-alive pool, rate limiter
+# and metrics for the full pass.
+import importlib
+import sys
+
+import sec_client
 
 SCRIPTS = [
     "run_sec.py",
@@ -17,6 +25,27 @@ SCRIPTS = [
     "daily_brief.py",
 ]
 
-py = sys.executable
-for s in SCRIPTS:
-    subprocess.run([py, s], check=True)
+
+def run_stage(script: str) -> None:
+    mod = importlib.import_module(script[:-3] if script.endswith(".py") else script)
+    argv = sys.argv
+    sys.argv = [script]  # stages see a clean command line, as when run standalone
+    try:
+        mod.main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{script} exited with status {e.code}") from e
+    finally:
+        sys.argv = argv
+
+
+def main():
+    for s in SCRIPTS:
+        print(f"=== {s}")
+        run_stage(s)
+    print("=== SEC HTTP totals")
+    sec_client.print_metrics()
+
+
+if __name__ == "__main__":
+    main()
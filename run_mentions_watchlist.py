@@ -8,20 +8,35 @@
 #   UNIVERSE_FILE             path to universe csv (ticker,cik)
 #   MENTIONS_RSS_DAYS         lookback window in days (default 30)
 #   MENTIONS_RSS_MAX_ITEMS    max items per ticker (default 15)
-#   MENTIONS_RSS_SLEEP        sleep seconds between tickers (default 0.4)
+#   MENTIONS_RSS_WORKERS      concurrent ticker queries (default 8)
+#   MENTIONS_RSS_MAX_RPS      global request rate across workers (default 1/MENTIONS_RSS_SLEEP, i.e. 2.5)
+#   MENTIONS_RSS_SLEEP        old per-ticker pause (default 0.4); only sets the default rate now
+#   MENTIONS_RSS_RETRIES      attempts per ticker on errors/429/5xx (default 3)
 #   MENTIONS_RSS_CATALYST     1 = add FDA/catalyst keywords (default 1), 0 = ticker only
 #   RSS_USER_AGENT            user-agent for RSS requests (default lia-biopharma/0.1)
 #   MENTIONS_RSS_DEBUG_TICKER if set (e.g. IBRX), only fetch this ticker
+#   MENTIONS_SCHEDULE         1 = poll tickers by priority (default 1), 0 = every ticker every run
+#   MENTIONS_HOT_DAYS         exact catalyst within this many days -> polled every run (default 14)
+#   MENTIONS_HOT_TREND_TOP    top-N trend_score tickers -> polled every run (default 50)
+#   MENTIONS_WARM_HOURS       refresh interval for tickers with any upcoming catalyst / trend (default 6)
+#   MENTIONS_DORMANT_HOURS    refresh interval for everything else (default 24)
 
 import os
 import time
 import re
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote_plus
+from email.utils import parsedate_to_datetime
 import xml.etree.ElementTree as ET
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+from sec_client import TokenBucket  # same limiter the SEC stages use
 
 OUT = "out/mentions_watchlist.csv"
 
@@ -38,10 +53,30 @@ UNIVERSE_CANDIDATES = [
 LOOKBACK_DAYS = int(os.getenv("MENTIONS_RSS_DAYS", "30"))
 MAX_ITEMS = int(os.getenv("MENTIONS_RSS_MAX_ITEMS", "15"))
 SLEEP = float(os.getenv("MENTIONS_RSS_SLEEP", "0.4"))
+WORKERS = int(os.getenv("MENTIONS_RSS_WORKERS", "8"))
+MAX_RPS = float(os.getenv("MENTIONS_RSS_MAX_RPS", str(1.0 / SLEEP if SLEEP > 0 else 10.0)))
+RETRIES = int(os.getenv("MENTIONS_RSS_RETRIES", "3"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PROGRESS_EVERY = 50
 CATALYST_MODE = os.getenv("MENTIONS_RSS_CATALYST", "1").strip() != "0"
 DEBUG_TICKER = os.getenv("MENTIONS_RSS_DEBUG_TICKER", "").strip().upper()
 UA = os.getenv("RSS_USER_AGENT", "lia-biopharma/0.1")
 
+# Priority scheduling: each ticker gets a refresh interval from its catalyst/trend state;
+# last poll times persist between runs, and tickers that aren't due keep their previous rows.
+SCHEDULE = os.getenv("MENTIONS_SCHEDULE", "1").strip() != "0"
+SCHEDULE_PATH = "data/cache/watchlist_schedule.json"
+CALENDAR_MASTER = "out/catalyst_calendar_master.csv"
+TRENDS = "out/trends_v2.csv"
+HOT_DAYS = int(os.getenv("MENTIONS_HOT_DAYS", "14"))
+HOT_TREND_TOP = int(os.getenv("MENTIONS_HOT_TREND_TOP", "50"))
+WARM_HOURS = float(os.getenv("MENTIONS_WARM_HOURS", "6"))
+DORMANT_HOURS = float(os.getenv("MENTIONS_DORMANT_HOURS", "24"))
+GRACE_MINUTES = 10  # a daily job that starts a few minutes early still counts as due
+TIER_HOURS = {"hot": 0.0, "warm": WARM_HOURS, "dormant": DORMANT_HOURS}
+
+OUT_COLS = ["ticker","title","url","published","source","query"]
+
 BASE_URL = "https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
 
 # Add these only in catalyst mode to reduce noise
@@ -66,25 +101,65 @@ def load_universe_tickers(path: str) -> list[str]:
     tickers = [t for t in tickers if re.fullmatch(r"[A-Z]{1,6}", t)]
     return sorted(set(tickers))
 
-def parse_rss_items(xml_text: str) -> list[dict]:
+PARSE_CHUNK = 1 << 14  # characters fed to the pull parser at a time
+
+def item_fields(item: ET.Element) -> dict:
+    title = (item.findtext("title") or "").strip()
+    link = (item.findtext("link") or "").strip()
+    pub = (item.findtext("pubDate") or "").strip()
+    source = ""
+    src_node = item.find("source")
+    if src_node is not None and src_node.text:
+        source = src_node.text.strip()
+    return {"title": title, "url": link, "published_raw": pub, "source": source}
+
+def iter_rss_items(xml_text: str):
+    """
+    Yield items (as parse_rss_items does) while the document is still being parsed, so a
+    caller that stops early never parses the rest. Each <item> is cleared once read.
+    Raises ET.ParseError when malformed XML is reached.
+    """
     # Google News RSS is RSS2.0; items are under channel/item
-    root = ET.fromstring(xml_text)
-    out = []
-    for item in root.findall(".//item"):
-        title = (item.findtext("title") or "").strip()
-        link = (item.findtext("link") or "").strip()
-        pub = (item.findtext("pubDate") or "").strip()
-        source = ""
-        src_node = item.find("source")
-        if src_node is not None and src_node.text:
-            source = src_node.text.strip()
-        out.append({"title": title, "url": link, "published_raw": pub, "source": source})
-    return out
+    parser = ET.XMLPullParser(events=("end",))
+    for i in range(0, len(xml_text), PARSE_CHUNK):
+        parser.feed(xml_text[i:i + PARSE_CHUNK])
+        for _, elem in parser.read_events():
+            if elem.tag == "item":
+                yield item_fields(elem)
+                elem.clear()
+    parser.close()
+    for _, elem in parser.read_events():
+        if elem.tag == "item":
+            yield item_fields(elem)
+            elem.clear()
+
+def parse_rss_items(xml_text: str) -> list[dict]:
+    return list(iter_rss_items(xml_text))
 
 def parse_pubdate(pub: str):
-    # pandas handles RFC822-ish
-    dt = pd.to_datetime(pub, errors="coerce", utc=True)
-    return dt
+    # Google News sends RFC822 "..., DD Mon YYYY HH:MM:SS GMT": the stdlib parses that far
+    # faster than pandas; anything else goes through pandas as before
+    if pub.endswith(" GMT"):
+        try:
+            return pd.Timestamp(parsedate_to_datetime(pub)).tz_convert("UTC")
+        except (TypeError, ValueError, IndexError):
+            pass
+    return pd.to_datetime(pub, errors="coerce", utc=True)
+
+def collect_items(xml_text: str, cutoff: datetime) -> list[dict]:
+    """
+    In-window items in feed order (published = UTC ISO string), at most MAX_ITEMS.
+    Parsing stops at the MAX_ITEMS-th kept item.
+    """
+    kept = []
+    for it in iter_rss_items(xml_text):
+        dt = parse_pubdate(it["published_raw"])
+        if pd.isna(dt) or dt < cutoff:
+            continue
+        kept.append({"title": it["title"], "url": it["url"], "published": dt.isoformat(), "source": it["source"]})
+        if len(kept) >= MAX_ITEMS:
+            break
+    return kept
 
 def build_query(ticker: str) -> str:
     if not CATALYST_MODE:
@@ -93,6 +168,149 @@ def build_query(ticker: str) -> str:
     # Example: "IBRX (FDA OR PDUFA ...)"
     return f"{ticker} {CATALYST_SUFFIX}"
 
+def make_session(pool_size: int) -> requests.Session:
+    s = requests.Session()
+    s.headers.update({
+        "User-Agent": UA,
+        "Accept": "application/rss+xml,application/xml,text/xml;q=0.9,*/*;q=0.8",
+    })
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+def fetch_ticker(s: requests.Session, limiter: TokenBucket | None, ticker: str, cutoff: datetime) -> dict:
+    """
+    One Google News query, retried up to RETRIES times on network errors and RETRY_STATUSES.
+    Returns {"ticker", "query", "items" (collect_items; None on failure), "attempts", "error"}.
+    """
+    q = build_query(ticker)
+    url = BASE_URL.format(q=quote_plus(q))
+    res = {"ticker": ticker, "query": q, "items": None, "attempts": 0, "error": ""}
+    for i in range(max(1, RETRIES)):
+        if limiter is not None:
+            limiter.acquire()
+        res["attempts"] += 1
+        try:
+            r = s.get(url, timeout=25)
+            if r.status_code in RETRY_STATUSES:
+                res["error"] = f"HTTP {r.status_code}"
+            else:
+                r.raise_for_status()
+                res["items"] = collect_items(r.text, cutoff)
+                res["error"] = ""
+                return res
+        except (requests.HTTPError, ET.ParseError) as e:
+            # other 4xx, or a body that isn't RSS: retrying won't help
+            res["error"] = f"{type(e).__name__}: {str(e)[:120]}"
+            return res
+        except Exception as e:
+            res["error"] = f"{type(e).__name__}: {str(e)[:120]}"
+        if i + 1 < RETRIES:
+            time.sleep(min(10.0, 0.5 * (2 ** i) + random.random() * 0.5))
+    return res
+
+def fetch_all(tickers: list[str], cutoff: datetime) -> dict:
+    """
+    Fan the ticker queries out over WORKERS threads, all paced by one MAX_RPS limiter.
+    Returns ticker -> fetch_ticker result; prints progress every PROGRESS_EVERY tickers.
+    """
+    workers = max(1, min(WORKERS, len(tickers) or 1))
+    s = make_session(workers)
+    limiter = TokenBucket(MAX_RPS) if MAX_RPS > 0 else None
+    print(f"Fetching {len(tickers)} tickers: workers={workers} max_rps={MAX_RPS:g} retries={RETRIES}")
+
+    results = {}
+    stats = {"done": 0, "failed": 0, "retries": 0}
+    t0 = time.monotonic()
+
+    def progress(label: str):
+        el = time.monotonic() - t0
+        reqs = stats["done"] + stats["retries"]
+        print(
+            f"{label}: {stats['done']}/{len(tickers)} tickers | failed={stats['failed']} "
+            f"| retries={stats['retries']} | {reqs / el if el > 0 else 0.0:.1f} req/s | {el:.1f}s"
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = [ex.submit(fetch_ticker, s, limiter, t, cutoff) for t in tickers]
+        for fut in as_completed(futs):
+            res = fut.result()
+            results[res["ticker"]] = res
+            stats["done"] += 1
+            stats["retries"] += res["attempts"] - 1
+            stats["failed"] += int(res["items"] is None)
+            if stats["done"] % PROGRESS_EVERY == 0 and stats["done"] < len(tickers):
+                progress("progress")
+    progress("fetched")
+    return results
+
+def read_csv_if_exists(path: str) -> pd.DataFrame:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame()
+    try:
+        return pd.read_csv(path, dtype=str).fillna("")
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+def ticker_tiers(now: datetime) -> dict:
+    """
+    ticker -> "hot" | "warm" (tickers not listed are dormant).
+      hot:  exact catalyst in the master calendar within HOT_DAYS, or top HOT_TREND_TOP trend_score
+      warm: any upcoming catalyst, or trend_score > 0
+    """
+    tiers = {}
+    today = now.date()
+
+    cal = read_csv_if_exists(CALENDAR_MASTER)
+    if not cal.empty and "ticker" in cal.columns and "catalyst_date" in cal.columns:
+        d = pd.to_datetime(cal["catalyst_date"], errors="coerce")
+        days = (d.dt.date.map(lambda x: (x - today).days if pd.notna(x) else None))
+        approx = pd.to_numeric(cal.get("approximate", 0), errors="coerce").fillna(0).astype(int)
+        tk = cal["ticker"].astype(str).str.upper().str.strip()
+        upcoming = days.notna() & (days.fillna(-1) >= 0)
+        for t in tk[upcoming]:
+            tiers.setdefault(t, "warm")
+        for t in tk[upcoming & (days.fillna(-1) <= HOT_DAYS) & (approx == 0)]:
+            tiers[t] = "hot"
+
+    tr = read_csv_if_exists(TRENDS)
+    if not tr.empty and "ticker" in tr.columns and "trend_score" in tr.columns:
+        tr["ticker"] = tr["ticker"].astype(str).str.upper().str.strip()
+        tr["trend_score"] = pd.to_numeric(tr["trend_score"], errors="coerce").fillna(0.0)
+        tr = tr[tr["trend_score"] > 0].sort_values("trend_score", ascending=False, kind="mergesort")
+        for i, t in enumerate(tr["ticker"]):
+            if i < HOT_TREND_TOP:
+                tiers[t] = "hot"
+            else:
+                tiers.setdefault(t, "warm")
+    return tiers
+
+def load_schedule() -> dict:
+    if not os.path.exists(SCHEDULE_PATH):
+        return {}
+    try:
+        return json.load(open(SCHEDULE_PATH, "r", encoding="utf-8"))
+    except Exception:
+        return {}
+
+def save_schedule(schedule: dict):
+    os.makedirs(os.path.dirname(SCHEDULE_PATH), exist_ok=True)
+    tmp = SCHEDULE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(schedule, f, indent=1, sort_keys=True)
+    os.replace(tmp, SCHEDULE_PATH)
+
+def is_due(entry: dict | None, tier: str, now: datetime) -> bool:
+    """Due when never polled, or the current tier's interval has passed since the last poll."""
+    if not entry or not entry.get("last_polled_utc"):
+        return True
+    last = pd.to_datetime(entry["last_polled_utc"], errors="coerce", utc=True)
+    if pd.isna(last):
+        return True
+    due = last + timedelta(hours=TIER_HOURS[tier]) - timedelta(minutes=GRACE_MINUTES)
+    return now >= due
+
 def main():
     os.makedirs("out", exist_ok=True)
 
@@ -102,63 +320,65 @@ def main():
             "Could not find universe file. Set UNIVERSE_FILE or create data/universe_biopharma.csv"
         )
 
-    tickers = load_universe_tickers(uni)
+    universe = load_universe_tickers(uni)
+    tickers = universe
     if DEBUG_TICKER:
         tickers = [t for t in tickers if t == DEBUG_TICKER]
         print(f"DEBUG: limiting to ticker={DEBUG_TICKER}, universe rows={len(tickers)}")
 
-    cutoff = datetime.now(timezone.utc) - timedelta(days=LOOKBACK_DAYS)
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=LOOKBACK_DAYS)
 
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": UA,
-        "Accept": "application/rss+xml,application/xml,text/xml;q=0.9,*/*;q=0.8",
-    })
+    scheduled = SCHEDULE and not DEBUG_TICKER
+    schedule = load_schedule() if scheduled else {}
+    tiers = ticker_tiers(now) if scheduled else {}
+    if scheduled:
+        tickers = [t for t in universe if is_due(schedule.get(t), tiers.get(t, "dormant"), now)]
+        n_hot = sum(1 for t in universe if tiers.get(t) == "hot")
+        n_warm = sum(1 for t in universe if tiers.get(t) == "warm")
+        print(f"Schedule: hot={n_hot} warm={n_warm} dormant={len(universe) - n_hot - n_warm} | "
+              f"due now: {len(tickers)}/{len(universe)}")
+
+    results = fetch_all(tickers, cutoff)
 
     rows = []
     fetched = 0
     kept_total = 0
 
+    # results are consumed in ticker order, so the output matches a serial run
     for t in tickers:
-        q = build_query(t)
-        url = BASE_URL.format(q=quote_plus(q))
-
-        try:
-            r = s.get(url, timeout=25)
-            r.raise_for_status()
-            items = parse_rss_items(r.text)
-            fetched += 1
-        except Exception as e:
+        res = results[t]
+        if res["items"] is None:
             # don't kill the whole run on one ticker
-            time.sleep(SLEEP)
             continue
+        fetched += 1
+        for it in res["items"]:
+            rows.append({"ticker": t, **it, "query": res["query"]})
+        kept_total += len(res["items"])
+
+    # tickers not polled this run (not due, or the fetch failed) keep their previous rows
+    refreshed = {t for t in tickers if results[t]["items"] is not None}
+    if scheduled:
+        prev = read_csv_if_exists(OUT)
+        if not prev.empty and "ticker" in prev.columns and "published" in prev.columns:
+            pub = pd.to_datetime(prev["published"], errors="coerce", utc=True)
+            keep = ~prev["ticker"].isin(refreshed) & prev["ticker"].isin(universe) & pub.ge(cutoff)
+            carried = prev.loc[keep].reindex(columns=OUT_COLS, fill_value="")
+            rows.extend(carried.to_dict("records"))
+            print(f"Carried over {len(carried)} rows for {carried['ticker'].nunique()} tickers not refreshed")
 
-        kept = 0
-        for it in items:
-            dt = parse_pubdate(it["published_raw"])
-            if pd.isna(dt):
-                continue
-            if dt < cutoff:
-                continue
-
-            rows.append({
-                "ticker": t,
-                "title": it["title"],
-                "url": it["url"],
-                "published": dt.isoformat(),
-                "source": it["source"],
-                "query": q,
-            })
-            kept += 1
-            if kept >= MAX_ITEMS:
-                break
-
-        kept_total += kept
-        time.sleep(SLEEP)
+        for t in refreshed:
+            tier = tiers.get(t, "dormant")
+            schedule[t] = {
+                "tier": tier,
+                "last_polled_utc": now.isoformat(),
+                "next_due_utc": (now + timedelta(hours=TIER_HOURS[tier])).isoformat(),
+            }
+        save_schedule(schedule)
 
     out = pd.DataFrame(rows)
     if out.empty:
-        out = pd.DataFrame(columns=["ticker","title","url","published","source","query"])
+        out = pd.DataFrame(columns=OUT_COLS)
     else:
         out["ticker"] = out["ticker"].astype(str).str.upper().str.strip()
         out = out.drop_duplicates(subset=["ticker","title","url"], keep="first")
@@ -166,7 +386,7 @@ def main():
 
     out.to_csv(OUT, index=False)
     print(f"Wrote {OUT} with {len(out)} rows")
-    print(f"Universe tickers: {len(load_universe_tickers(uni))} | Queried: {len(tickers)} | Fetched: {fetched} | Kept: {kept_total}")
+    print(f"Universe tickers: {len(universe)} | Queried: {len(tickers)} | Fetched: {fetched} | Kept: {kept_total}")
     print(f"Catalyst mode: {'ON' if CATALYST_MODE else 'OFF'} | Lookback: {LOOKBACK_DAYS}d | Max/ticker: {MAX_ITEMS}")
 
 if __name__ == "__main__":
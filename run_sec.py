@@ -2,16 +2,14 @@
 import os
 import json
 import time
-import random
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
 import pandas as pd
 import requests
 
-# ----------------------------
-# REQUIRED: identify yourself
-# ----------------------------
-USER_AGENT = os.getenv("SEC_USER_AGENT", "lia-biopharma/0.1 (contact: you@example.com)")  # CHANGE THIS
+# User-Agent (SEC_USER_AGENT), rate limit (SEC_MAX_RPS) and retry policy live in sec_client.py
+import sec_client
 
 # ----------------------------
 # Output + state
@@ -19,19 +17,37 @@ USER_AGENT = os.getenv("SEC_USER_AGENT", "lia-biopharma/0.1 (contact: you@exampl
 OUT_NEW = "out/sec_new_filings.csv"
 STATE_PATH = "data/cache/sec_state.json"
 
+# Conditional-GET cache: per CIK, the last submissions body plus its ETag/Last-Modified
+SUBMISSIONS_CACHE_DIR = "data/cache/sec_submissions"
+
+# ----------------------------
+# Source selection
+# ----------------------------
+# submissions  : one data.sec.gov submissions JSON per CIK (default)
+# daily_index  : one EDGAR daily master index per business day in the window, joined
+#                against the universe CIKs in memory (request count independent of universe size)
+SOURCE = os.getenv("SEC_SOURCE", "submissions").strip().lower()
+DAILY_INDEX_DIR = os.getenv("SEC_DAILY_INDEX_DIR", "").strip()   # optional local replica of master.YYYYMMDD.idx files
+DAILY_INDEX_CACHE_DIR = "data/cache/sec_daily_index"              # past days are immutable: cached forever
+DAILY_INDEX_BASE = "https://www.sec.gov/Archives/edgar/daily-index"
+
 # ----------------------------
 # Rolling window controls
 # ----------------------------
 REFRESH_DAYS = int(os.getenv("SEC_REFRESH_DAYS", "14"))      # recommended: 7–30
 MAX_PER_CIK = int(os.getenv("SEC_MAX_PER_CIK", "80"))        # cap per CIK from 'recent'
-SLEEP_SEC = float(os.getenv("SEC_SLEEP_SEC", "0.25"))        # throttle
+
+# Concurrent mode: SEC_WORKERS > 1 fetches CIKs on a thread pool. Every request is paced
+# by sec_client's shared token bucket (SEC_MAX_RPS, default 10 = SEC's fair-access limit).
+WORKERS = int(os.getenv("SEC_WORKERS", "1"))
 
 # Optional: limit forms early (comma-separated). Leave empty to include all forms.
 # Example: set SEC_FORMS=8-K,8-K/A,6-K
 SEC_FORMS = os.getenv("SEC_FORMS", "").strip()
 
-MAX_RETRIES = 7
-RETRY_STATUSES = {403, 429, 503}
+# SEC_ONLY_NEW=1: skip rows already covered by last_seen_filingDate_by_cik (unchanged CIKs
+# emit nothing). Default 0 keeps the full rolling window that filter_filings.py expects.
+ONLY_NEW = os.getenv("SEC_ONLY_NEW", "0").strip() == "1"
 
 # ----------------------------
 # Universe auto-detect
@@ -99,21 +115,76 @@ def save_state(st):
     os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
     json.dump(st, open(STATE_PATH, "w", encoding="utf-8"), indent=2)
 
-def backoff_sleep(i: int):
-    time.sleep(min(30.0, (2 ** i) + random.random()))
-
-def sec_get_json_with_retry(s: requests.Session, url: str) -> dict:
-    last = None
-    for i in range(MAX_RETRIES):
-        r = s.get(url, timeout=60)
-        last = r.status_code
-        if r.status_code == 200:
-            return r.json()
-        if r.status_code in RETRY_STATUSES:
-            backoff_sleep(i)
-            continue
-        r.raise_for_status()
-    raise RuntimeError(f"SEC fetch failed after retries: status={last} url={url}")
+def sec_get_with_retry(url: str, headers: dict | None = None) -> requests.Response:
+    """Returns the response on 200 or 304 (conditional requests); retries via sec_client."""
+    return sec_client.get(url, headers=headers, ok_statuses=(200, 304))
+
+def sec_get_json_with_retry(url: str) -> dict:
+    return sec_client.get_json(url)
+
+# ----------------------------
+# Submissions validator cache
+# ----------------------------
+RECENT_FIELDS = ["form", "filingDate", "accessionNumber", "primaryDocument"]
+
+def cache_paths(cik10: str):
+    base = os.path.join(SUBMISSIONS_CACHE_DIR, f"CIK{cik10}")
+    return base + ".json", base + ".meta.json"
+
+def write_atomic(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def load_cache_meta(cik10: str) -> dict:
+    body_path, meta_path = cache_paths(cik10)
+    if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+        return {}
+    try:
+        return json.load(open(meta_path, "r", encoding="utf-8"))
+    except Exception:
+        return {}
+
+def trim_recent(data: dict) -> dict:
+    recent = (data.get("filings", {}) or {}).get("recent", {}) or {}
+    return {k: list(recent.get(k, []) or [])[:MAX_PER_CIK] for k in RECENT_FIELDS}
+
+def fetch_submissions(cik10: str):
+    """
+    Conditional GET for one CIK. Returns (recent, not_modified) where recent holds the
+    RECENT_FIELDS arrays trimmed to MAX_PER_CIK. On 304 the arrays come straight from the
+    cache meta file, so the (large) submissions body is not parsed at all.
+    """
+    meta = load_cache_meta(cik10)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    r = sec_get_with_retry(submissions_url(cik10), headers=headers or None)
+    body_path, meta_path = cache_paths(cik10)
+
+    if r.status_code == 304:
+        if meta.get("max_per_cik", 0) >= MAX_PER_CIK and "recent" in meta:
+            return meta["recent"], True
+        # cached arrays were trimmed shorter than the current MAX_PER_CIK: re-read the body
+        return trim_recent(json.load(open(body_path, "r", encoding="utf-8"))), True
+
+    data = r.json()
+    recent = trim_recent(data)
+    os.makedirs(SUBMISSIONS_CACHE_DIR, exist_ok=True)
+    write_atomic(body_path, r.content)
+    new_meta = {
+        "etag": r.headers.get("ETag", ""),
+        "last_modified": r.headers.get("Last-Modified", ""),
+        "fetched_utc": datetime.now(timezone.utc).isoformat(),
+        "max_per_cik": MAX_PER_CIK,
+        "recent": recent,
+    }
+    write_atomic(meta_path, json.dumps(new_meta).encode("utf-8"))
+    return recent, False
 
 def parse_form_filter():
     if not SEC_FORMS:
@@ -121,6 +192,134 @@ def parse_form_filter():
     forms = [x.strip().upper() for x in SEC_FORMS.split(",") if x.strip()]
     return set(forms) if forms else None
 
+def submissions_url(cik10: str) -> str:
+    return f"https://data.sec.gov/submissions/CIK{cik10}.json"
+
+def fetch_all(cik_list: list, workers: int) -> list:
+    """
+    Returns (recent, not_modified) (or None on failure) per CIK, in input order.
+    workers > 1 uses a bounded thread pool; pacing comes from sec_client's shared limiter
+    and each request keeps its retry/backoff.
+    """
+    def fetch_one(cik10):
+        try:
+            return fetch_submissions(cik10)
+        except Exception:
+            return None
+
+    if workers <= 1:
+        return [fetch_one(c) for c in cik_list]
+
+    sec_client.ensure_pool_size(workers)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(fetch_one, cik_list))
+
+# ----------------------------
+# Daily index mode
+# ----------------------------
+def daily_index_quarter_url(d: date) -> str:
+    return f"{DAILY_INDEX_BASE}/{d.year}/QTR{(d.month - 1) // 3 + 1}/"
+
+def list_daily_index_files(quarter_url: str) -> set:
+    # Directory listing tells us which days exist (no weekends/holidays, today only after publication)
+    data = sec_get_json_with_retry(quarter_url + "index.json")
+    items = (data.get("directory", {}) or {}).get("item", []) or []
+    return {str(it.get("name", "")) for it in items}
+
+def load_daily_index(day: date, listings: dict) -> str | None:
+    name = f"master.{day:%Y%m%d}.idx"
+
+    if DAILY_INDEX_DIR:
+        for p in [os.path.join(DAILY_INDEX_DIR, name),
+                  os.path.join(DAILY_INDEX_DIR, str(day.year), f"QTR{(day.month - 1) // 3 + 1}", name)]:
+            if os.path.exists(p):
+                return open(p, "r", encoding="latin-1").read()
+        return None
+
+    cache_path = os.path.join(DAILY_INDEX_CACHE_DIR, name)
+    if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
+        return open(cache_path, "r", encoding="latin-1").read()
+
+    qurl = daily_index_quarter_url(day)
+    if qurl not in listings:
+        try:
+            listings[qurl] = list_daily_index_files(qurl)
+        except Exception:
+            listings[qurl] = None  # the quarter's other days fail fast instead of retrying the listing
+            raise
+    if listings[qurl] is None:
+        raise RuntimeError(f"no listing for {qurl}")
+    if name not in listings[qurl]:
+        return None
+
+    r = sec_get_with_retry(qurl + name)
+    os.makedirs(DAILY_INDEX_CACHE_DIR, exist_ok=True)
+    write_atomic(cache_path, r.content)
+    return r.content.decode("latin-1")
+
+def parse_master_index(txt: str):
+    """Yields (cik10, form, filingDate, accession) from a master.idx body (CIK|Company|Form|Date|File)."""
+    started = False
+    for line in txt.splitlines():
+        if not started:
+            started = line.startswith("-----")
+            continue
+        parts = line.split("|")
+        if len(parts) != 5:
+            continue
+        cik, _, form, fdate, fname = [p.strip() for p in parts]
+        if not cik.isdigit() or not fname:
+            continue
+        if len(fdate) == 8 and fdate.isdigit():
+            fdate = f"{fdate[:4]}-{fdate[4:6]}-{fdate[6:]}"
+        acc = os.path.basename(fname)
+        if acc.endswith(".txt"):
+            acc = acc[:-4]
+        yield pad_cik(cik), form, fdate, acc
+
+def fetch_daily_index(ciks: set, start: date, end: date):
+    """
+    Hash-join every daily master index in [start, end] against the universe CIK set.
+    Returns ({cik10: (recent, False)}, files_loaded, days_failed) where recent mirrors the
+    submissions 'recent' arrays (newest first, trimmed to MAX_PER_CIK). The index has no
+    primary document, so primaryDocument is left empty. A day whose listing or index file
+    cannot be fetched is logged and skipped (nothing is cached for it, so the next run
+    tries again).
+    """
+    listings = {}
+    hits = {}
+    files = 0
+    failed = 0
+
+    d = start
+    while d <= end:
+        day = d
+        d += timedelta(days=1)
+        try:
+            txt = load_daily_index(day, listings)
+        except Exception as e:
+            failed += 1
+            print(f"Daily index {day.isoformat()} failed, skipped: {type(e).__name__}: {e}")
+            continue
+        if txt is None:
+            continue
+        files += 1
+        for cik10, form, fdate, acc in parse_master_index(txt):
+            if cik10 in ciks:
+                hits.setdefault(cik10, []).append((fdate, acc, form))
+
+    by_cik = {}
+    for cik10 in ciks:
+        filings = sorted(hits.get(cik10, []), reverse=True)[:MAX_PER_CIK]
+        recent = {
+            "form": [f for _, _, f in filings],
+            "filingDate": [fd for fd, _, _ in filings],
+            "accessionNumber": [a for _, a, _ in filings],
+            "primaryDocument": ["" for _ in filings],
+        }
+        by_cik[cik10] = (recent, False)
+    return by_cik, files, failed
+
 def main():
     os.makedirs("out", exist_ok=True)
 
@@ -162,29 +361,44 @@ def main():
     if form_filter:
         print(f"Form filter enabled: {sorted(form_filter)}")
 
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept-Encoding": "gzip, deflate",
-        "Accept": "application/json,text/plain,*/*",
-    })
+    tickers = uni["ticker"].tolist()
+    cik_list = [pad_cik(c) for c in uni["cik"].tolist()]
+    # share-class tickers can map to the same CIK: fetch each CIK once
+    unique_ciks = list(dict.fromkeys(cik_list))
+
+    req0 = sec_client.request_count()
+    t0 = time.monotonic()
+    index_failures = 0
+    if SOURCE == "daily_index":
+        print(f"Daily index mode: {cutoff_date.isoformat()} .. {now.date().isoformat()}"
+              + (f" (local replica {DAILY_INDEX_DIR})" if DAILY_INDEX_DIR else ""))
+        by_cik, index_files, index_failures = fetch_daily_index(set(unique_ciks), cutoff_date, now.date())
+    else:
+        if WORKERS > 1:
+            print(f"Concurrent fetch: workers={WORKERS}, max_rps={sec_client.MAX_RPS}")
+        by_cik = dict(zip(unique_ciks, fetch_all(unique_ciks, WORKERS)))
+    elapsed = time.monotonic() - t0
+    requests_made = sec_client.request_count() - req0
+
+    # last_seen as of the previous run (last_seen is updated in place below)
+    prev_seen = dict(last_seen)
 
     rows = []
-    failures = 0
-
-    for _, r in uni.iterrows():
-        ticker = r["ticker"]
-        cik10 = pad_cik(r["cik"])
-        url = f"https://data.sec.gov/submissions/CIK{cik10}.json"
-
-        try:
-            data = sec_get_json_with_retry(s, url)
-        except Exception:
+    failures = index_failures  # daily index mode: days that could not be loaded
+    not_modified = sum(1 for x in by_cik.values() if x is not None and x[1])
+    skipped_unchanged = 0
+
+    # Walk results in universe order so the output is identical to a serial run
+    for ticker, cik10 in zip(tickers, cik_list):
+        res = by_cik[cik10]
+        if res is None:
             failures += 1
-            time.sleep(SLEEP_SEC)
             continue
 
-        recent = (data.get("filings", {}) or {}).get("recent", {}) or {}
+        recent, unchanged = res
+        if ONLY_NEW and unchanged and cik10 in prev_seen:
+            skipped_unchanged += 1
+            continue
 
         forms = recent.get("form", []) or []
         dates = recent.get("filingDate", []) or []
@@ -209,6 +423,9 @@ def main():
             if form_filter and form not in form_filter:
                 continue
 
+            if ONLY_NEW and fdate < prev_seen.get(cik10, ""):
+                continue
+
             acc_dash = accession_with_dashes(acc)
             acc_nodash = accession_no_dashes(acc_dash)
 
@@ -230,8 +447,6 @@ def main():
         if len(dates) > 0 and str(dates[0]).strip():
             last_seen[cik10] = str(dates[0]).strip()
 
-        time.sleep(SLEEP_SEC)
-
     out = pd.DataFrame(rows)
     cols = ["ticker","cik","form","filingDate","accessionNumber","primaryDocument","doc_url"]
     for c in cols:
@@ -245,6 +460,15 @@ def main():
 
     out.to_csv(OUT_NEW, index=False)
     print(f"Wrote {OUT_NEW} with {len(out)} rows (refresh_days={REFRESH_DAYS}, cutoff={cutoff}, failures={failures})")
+    rps = requests_made / elapsed if elapsed > 0 else 0.0
+    if SOURCE == "daily_index":
+        print(f"Joined {index_files} daily index files against {len(unique_ciks)} CIKs "
+              f"with {requests_made} requests in {elapsed:.1f}s, failed_days={index_failures}")
+    else:
+        print(f"Fetched {len(unique_ciks)} CIKs with {requests_made} requests in {elapsed:.1f}s ({rps:.2f} req/s), "
+              f"not_modified={not_modified}" + (f", skipped_unchanged={skipped_unchanged}" if ONLY_NEW else ""))
+
+    sec_client.print_metrics()
 
     st["last_run_utc"] = now.isoformat()
     st["last_seen_filingDate_by_cik"] = last_seen
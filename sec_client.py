@@ -0,0 +1,180 @@
+# sec_client.py — Shared HTTP client for every SEC-fetching script
+#
+# One pooled requests.Session (keep-alive, reused TCP/TLS connections), one process-wide
+# token-bucket rate limiter for *.sec.gov hosts, one retry/backoff policy and per-host
+# request metrics. run_all.py runs the stages in-process, so a full pass shares all of it.
+#
+# Env vars:
+#   SEC_USER_AGENT   -> required by SEC (name + email)
+#   SEC_MAX_RPS      -> global SEC request rate (default 10, SEC's fair-access limit)
+#   SEC_POOL_SIZE    -> connections kept alive per host (default 16)
+
+import os
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = os.getenv("SEC_USER_AGENT", "lia-biopharma/0.1 (contact: you@example.com)")  # CHANGE THIS
+
+MAX_RPS = float(os.getenv("SEC_MAX_RPS", "10"))
+POOL_SIZE = int(os.getenv("SEC_POOL_SIZE", "16"))
+
+MAX_RETRIES = 7
+RETRY_STATUSES = {403, 429, 503}
+TIMEOUT_SEC = 60
+
+# Hosts that count against SEC's limit (www.sec.gov, data.sec.gov, efts.sec.gov, ...)
+RATE_LIMITED_SUFFIX = "sec.gov"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: at most `rate` acquisitions per second.
+    capacity=1 keeps requests evenly spaced (no bursts above the limit).
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiter = TokenBucket(MAX_RPS)
+_session = None
+_session_lock = threading.Lock()
+
+# host -> {"requests", "retries", "errors", "bytes", "seconds", "status": {code: n}}
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _make_adapter(pool_size: int) -> HTTPAdapter:
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+
+def get_session() -> requests.Session:
+    """The process-wide session. Created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept-Encoding": "gzip, deflate",
+                "Accept": "application/json,text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            })
+            s.mount("https://", _make_adapter(POOL_SIZE))
+            s.mount("http://", _make_adapter(POOL_SIZE))
+            _session = s
+        return _session
+
+
+def ensure_pool_size(n: int) -> None:
+    """Grow the keep-alive pool so `n` threads can hold a connection each."""
+    global POOL_SIZE
+    if n <= POOL_SIZE:
+        return
+    POOL_SIZE = n
+    s = get_session()
+    s.mount("https://", _make_adapter(n))
+    s.mount("http://", _make_adapter(n))
+
+
+def _record(host: str, status, nbytes: int, seconds: float, retry: bool = False, error: bool = False):
+    with _metrics_lock:
+        m = _metrics.setdefault(host, {"requests": 0, "retries": 0, "errors": 0, "bytes": 0, "seconds": 0.0, "status": {}})
+        m["requests"] += 1
+        m["retries"] += int(retry)
+        m["errors"] += int(error)
+        m["bytes"] += int(nbytes)
+        m["seconds"] += float(seconds)
+        if status is not None:
+            m["status"][status] = m["status"].get(status, 0) + 1
+
+
+def backoff_sleep(i: int):
+    time.sleep(min(30.0, (2 ** i) + random.random()))
+
+
+def get(url: str, headers: dict | None = None, ok_statuses=(200,), timeout: float = TIMEOUT_SEC,
+        raise_errors: bool = True, stream: bool = False) -> requests.Response:
+    """
+    GET with the shared pool, rate limiter and retry policy.
+    - statuses in ok_statuses are returned
+    - RETRY_STATUSES back off exponentially (up to MAX_RETRIES attempts)
+    - anything else raises (or is returned when raise_errors=False)
+    """
+    host = urlparse(url).netloc.lower()
+    limited = host.endswith(RATE_LIMITED_SUFFIX)
+    s = get_session()
+
+    last = None
+    for i in range(MAX_RETRIES):
+        if limited:
+            _limiter.acquire()
+        t0 = time.monotonic()
+        try:
+            r = s.get(url, headers=headers, timeout=timeout, stream=stream)
+        except Exception:
+            _record(host, None, 0, time.monotonic() - t0, error=True)
+            raise
+        nbytes = 0 if stream else len(r.content)
+        last = r.status_code
+        retry = r.status_code in RETRY_STATUSES
+        _record(host, r.status_code, nbytes, time.monotonic() - t0, retry=retry)
+
+        if r.status_code in ok_statuses:
+            return r
+        if retry:
+            backoff_sleep(i)
+            continue
+        if raise_errors:
+            r.raise_for_status()
+        return r
+    raise RuntimeError(f"SEC fetch failed after retries: status={last} url={url}")
+
+
+def get_text(url: str, **kw) -> str:
+    return get(url, **kw).text
+
+
+def get_json(url: str, **kw):
+    return get(url, **kw).json()
+
+
+def request_count(host: str | None = None) -> int:
+    with _metrics_lock:
+        if host is not None:
+            return _metrics.get(host, {}).get("requests", 0)
+        return sum(m["requests"] for m in _metrics.values())
+
+
+def metrics() -> dict:
+    with _metrics_lock:
+        return {h: dict(m, status=dict(m["status"])) for h, m in _metrics.items()}
+
+
+def print_metrics() -> None:
+    for host, m in sorted(metrics().items()):
+        status = ",".join(f"{k}:{v}" for k, v in sorted(m["status"].items()))
+        print(
+            f"[http] {host}: requests={m['requests']} retries={m['retries']} errors={m['errors']} "
+            f"bytes={m['bytes']} time={m['seconds']:.1f}s status={status}"
+        )
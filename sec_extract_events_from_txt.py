@@ -1,19 +1,30 @@
 # sec_extract_events_from_txt.py (v2)
-import os, re, time, random
+import os, re
+import json
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import pandas as pd
-import requests
 
-USER_AGENT = "lia-biopharma/0.1 (contact: you@example.com)"  # CHANGE THIS
+import sec_client  # shared session, rate limit, retry policy (set SEC_USER_AGENT)
+import filing_cache  # shared compressed filing store (also used by the calendar stage)
+import filing_docs  # parse-once (doc_type, stripped_text) store
 
 WORKLIST = "out/sec_worklist.csv"
 OUT_EVENTS = "out/sec_events.csv"
 OUT_LOG = "out/sec_scan_log.csv"
 
-CACHE_DIR = "data/cache/sec_filing_txt_for_events"
+# Parse+scan processes (--workers) and download threads (shared with run_sec.py)
+WORKERS = int(os.getenv("SEC_EXTRACT_WORKERS", "1"))
+FETCH_WORKERS = int(os.getenv("SEC_WORKERS", "1"))
 
-SLEEP_BASE_SEC = 0.8
-MAX_RETRIES = 7
-RETRY_STATUSES = {403, 429, 503}
+# Scan ledger: accessions already scanned with the current PATTERNS are not re-scanned
+LEDGER_PATH = os.getenv("SEC_SCAN_LEDGER", "data/cache/sec_scan_ledger.sqlite")
+
+# Bump when scan_row's output changes for reasons PATTERNS/BASE_CONFIDENCE don't capture
+SCAN_VERSION = 1
 
 PATTERNS = [
     ("CRL", re.compile(r"\bcomplete response letter\b|\bCRL\b", re.I)),
@@ -25,140 +36,143 @@ PATTERNS = [
     ("TOPLINE", re.compile(r"\b(top-?line|topline|primary endpoint|met the primary endpoint|did not meet)\b", re.I)),
 ]
 
-def get_session():
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept-Encoding": "gzip, deflate",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    })
-    return s
-
-def backoff_sleep(i):
-    time.sleep(min(30.0, (2 ** i) + random.random() + SLEEP_BASE_SEC))
-
-def sec_get_with_retry(s, url: str) -> str:
-    last = None
-    for i in range(MAX_RETRIES):
-        r = s.get(url, timeout=60)
-        last = r.status_code
-        if r.status_code == 200:
-            return r.text
-        if r.status_code in RETRY_STATUSES:
-            backoff_sleep(i)
-            continue
-        r.raise_for_status()
-    raise RuntimeError(f"SEC fetch failed: status={last} url={url}")
-
-def cik_int(cik10: str) -> str:
-    return str(int(str(cik10)))
-
-def filing_txt_url(cik10: str, accession: str) -> str:
-    # /Archives/edgar/data/{cik}/{accession-with-dashes}.txt
-    return f"https://www.sec.gov/Archives/edgar/data/{cik_int(cik10)}/{accession}.txt"
-
-def strip_html(x: str) -> str:
-    x = re.sub(r"(?is)<script.*?>.*?</script>", " ", x)
-    x = re.sub(r"(?is)<style.*?>.*?</style>", " ", x)
-    x = re.sub(r"(?s)<.*?>", " ", x)
-    x = re.sub(r"\s+", " ", x)
-    return x.strip()
-
-def parse_documents(filing_txt: str):
-    # Requires <DOCUMENT> blocks; if missing, this wasn't a real submission file
-    parts = filing_txt.split("<DOCUMENT>")
-    docs = []
-    for p in parts[1:]:
-        mtype = re.search(r"(?im)^<TYPE>(.+)$", p)
-        mtext = re.search(r"(?is)<TEXT>(.*)</TEXT>", p)
-        dtype = (mtype.group(1).strip() if mtype else "")
-        body = (mtext.group(1) if mtext else "")
-        if body:
-            docs.append((dtype, strip_html(body)))
-    return docs
-
-def doc_score(dtype: str) -> int:
+BASE_CONFIDENCE = {
+    "CRL":0.9,"CLINICAL_HOLD":0.85,"PDUFA":0.8,"FILING_ACCEPTANCE":0.75,
+    "NDA_BLA_SUBMISSION":0.7,"ADCOM":0.7,"TOPLINE":0.65
+}
+
+# Every match of a pattern starts with one of its literal prefixes (lowercase).
+# Keep in sync with PATTERNS: a missing prefix silently drops matches. No prefix may be a
+# prefix of another (the alternation below reports one prefix per position).
+PATTERN_PREFIXES = {
+    "CRL": ("complete", "crl"),
+    "PDUFA": ("pdufa", "prescription", "action"),
+    "NDA_BLA_SUBMISSION": ("nda", "bla"),
+    "FILING_ACCEPTANCE": ("accepted", "filing"),
+    "ADCOM": ("advisory", "adcom", "odac", "vrbpac"),
+    "CLINICAL_HOLD": ("partial", "clinical", "trial"),
+    "TOPLINE": ("top", "primary", "met", "did"),
+}
+PREFIX_RE = re.compile("|".join(p for ps in PATTERN_PREFIXES.values() for p in ps))
+PREFIX_PATTERNS = {p: [i for i, (etype, _) in enumerate(PATTERNS) if p in PATTERN_PREFIXES[etype]]
+                   for ps in PATTERN_PREFIXES.values() for p in ps}
+
+# Characters re.I folds onto ASCII letters that str.lower() leaves alone (or lengthens).
+# Texts containing them take the per-pattern path so results stay identical.
+UNSAFE_FOLD = re.compile("[\u0130\u0131\u017f]")
+
+cik_int = filing_cache.cik_int
+filing_txt_url = filing_cache.filing_txt_url
+
+strip_html = filing_docs.strip_html
+parse_documents = filing_docs.parse_documents
+doc_score = filing_docs.doc_score
+
+def scan_events_per_pattern(text: str):
+    """Reference scan: one finditer pass per pattern. Returns [(etype, match)]."""
+    return [(etype, m) for etype, pat in PATTERNS for m in pat.finditer(text)]
+
+def scan_events(text: str):
     """
-    Relaxed matching:
-    - EX-99.1, EX-99.01 etc count
-    - 8-K/A counts as 8-K
+    Same result (and order) as scan_events_per_pattern, in one pass over the text:
+    a single alternation of the patterns' literal prefixes finds every position where a
+    pattern could start, and only those patterns are tried there. Per-pattern resume
+    positions reproduce finditer's non-overlapping semantics.
     """
-    t = (dtype or "").upper().strip()
-    if t.startswith("EX-99") or t.startswith("EX99"):
-        return 100
-    if re.match(r"^99(\.\d+)?", t):
-        return 90
-    if t.startswith("8-K"):
-        return 80
-    if t.startswith("10-Q"):
-        return 70
-    if t.startswith("10-K"):
-        return 65
-    return 0
+    low = text.lower()
+    if len(low) != len(text) or UNSAFE_FOLD.search(text):
+        return scan_events_per_pattern(text)
+
+    hits = [[] for _ in PATTERNS]
+    resume = [0] * len(PATTERNS)
+    m = PREFIX_RE.search(low)
+    while m:
+        pos = m.start()
+        for i in PREFIX_PATTERNS[m.group(0)]:
+            if pos >= resume[i]:
+                etype, pat = PATTERNS[i]
+                hit = pat.match(text, pos)
+                if hit:
+                    hits[i].append((etype, hit))
+                    resume[i] = hit.end()
+        m = PREFIX_RE.search(low, pos + 1)
+    return [h for per in hits for h in per]
 
 def snippet(text: str, start: int, end: int, pad: int = 220) -> str:
     a = max(0, start - pad)
     b = min(len(text), end + pad)
     return text[a:b]
 
-def main():
-    os.makedirs("out", exist_ok=True)
+def worklist_jobs(wk: pd.DataFrame):
+    jobs = []
+    for _, r in wk.iterrows():
+        jobs.append({
+            "ticker": str(r.get("ticker","")).upper(),
+            "cik": str(r.get("cik","")),
+            "accessionNumber": str(r.get("accessionNumber","")),
+            "form": str(r.get("form","")),
+            "filingDate": str(r.get("filingDate","")),
+            "fetch_error": "",
+        })
+    return jobs
 
-    event_cols = ["ticker","cik","form","filingDate","accessionNumber","doc_type",
-                  "event_type","confidence","snippet","doc_url"]
-    log_cols = ["ticker","cik","form","filingDate","accessionNumber","doc_url",
-                "fetch_ok","has_document_blocks","doc_count","selected_doc_types","notes"]
+def fetch_filings(jobs, workers: int = 1):
+    """
+    I/O stage: make sure every job's filing is in the filing cache (each accession once),
+    so the CPU stage never touches the network. Failures are recorded on the job.
+    """
+    todo = {}
+    for job in jobs:
+        if job["cik"] and job["accessionNumber"]:
+            todo.setdefault(job["accessionNumber"], job["cik"])
 
-    # Always write outputs (even empty)
-    if not os.path.exists(WORKLIST) or os.path.getsize(WORKLIST) == 0:
-        pd.DataFrame(columns=event_cols).to_csv(OUT_EVENTS, index=False)
-        pd.DataFrame(columns=log_cols).to_csv(OUT_LOG, index=False)
-        print(f"{WORKLIST} empty -> wrote empty {OUT_EVENTS} and {OUT_LOG}")
-        return
+    def fetch(item):
+        accession, cik10 = item
+        try:
+            filing_cache.ensure_cached(cik10, accession)
+            return accession, ""
+        except Exception as e:
+            return accession, f"{type(e).__name__}: {str(e)[:120]}"
 
-    wk = pd.read_csv(WORKLIST, dtype=str).fillna("")
-    if wk.empty:
-        pd.DataFrame(columns=event_cols).to_csv(OUT_EVENTS, index=False)
-        pd.DataFrame(columns=log_cols).to_csv(OUT_LOG, index=False)
-        print(f"{WORKLIST} has 0 rows -> wrote empty {OUT_EVENTS} and {OUT_LOG}")
-        return
+    items = list(todo.items())
+    if workers <= 1:
+        errors = dict(map(fetch, items))
+    else:
+        sec_client.ensure_pool_size(workers)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            errors = dict(ex.map(fetch, items))
+    for job in jobs:
+        job["fetch_error"] = errors.get(job["accessionNumber"], "")
 
-    s = get_session()
+def scan_row(job: dict):
+    """
+    CPU stage for one worklist row: parse (or load) the cached filing and scan it.
+    Returns (event rows, scan-log row). Runs in worker processes with --workers > 1.
+    """
+    ticker, cik10, accession = job["ticker"], job["cik"], job["accessionNumber"]
+    form, fdate = job["form"], job["filingDate"]
     events = []
-    scanlog = []
 
-    for _, r in wk.iterrows():
-        ticker = str(r.get("ticker","")).upper()
-        cik10 = str(r.get("cik",""))
-        accession = str(r.get("accessionNumber",""))
-        form = str(r.get("form",""))
-        fdate = str(r.get("filingDate",""))
-
-        if not cik10 or not accession:
-            scanlog.append({
-                "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
-                "accessionNumber": accession, "doc_url": "",
-                "fetch_ok": 0, "has_document_blocks": 0, "doc_count": 0,
-                "selected_doc_types": "", "notes": "missing cik/accession"
-            })
-            continue
+    if not cik10 or not accession:
+        return events, {
+            "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
+            "accessionNumber": accession, "doc_url": "",
+            "fetch_ok": 0, "has_document_blocks": 0, "doc_count": 0,
+            "selected_doc_types": "", "notes": "missing cik/accession"
+        }
 
-        url = filing_txt_url(cik10, accession)
-        cache_path = os.path.join(CACHE_DIR, cik_int(cik10), f"{accession}.txt")
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    url = filing_txt_url(cik10, accession)
 
-        fetch_ok = 1
-        notes = ""
-        try:
-            if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
-                filing_txt = open(cache_path, "r", encoding="utf-8", errors="ignore").read()
-            else:
-                filing_txt = sec_get_with_retry(s, url)
-                open(cache_path, "w", encoding="utf-8", errors="ignore").write(filing_txt)
-                time.sleep(SLEEP_BASE_SEC)
-        except Exception as e:
+    fetch_ok = 1
+    notes = ""
+
+    # Already parsed (earlier run or stage) -> no HTML stripping
+    parsed = filing_docs.load_parsed(accession)
+    if parsed is None:
+        entry = None if job["fetch_error"] else filing_cache.lookup(accession)
+        if entry is None:
             fetch_ok = 0
-            notes = f"download_error: {type(e).__name__}: {str(e)[:120]}"
+            notes = f"download_error: {job['fetch_error'] or 'not cached'}"
             # log a "download error" event row so you see it in output
             events.append({
                 "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
@@ -166,18 +180,17 @@ def main():
                 "event_type": "DOWNLOAD_ERROR", "confidence": 0.0,
                 "snippet": notes, "doc_url": url
             })
-            scanlog.append({
+            return events, {
                 "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
                 "accessionNumber": accession, "doc_url": url,
                 "fetch_ok": 0, "has_document_blocks": 0, "doc_count": 0,
                 "selected_doc_types": "", "notes": notes
-            })
-            continue
+            }
 
-        has_docs = 1 if "<DOCUMENT>" in filing_txt else 0
-        if not has_docs:
+        if not entry["has_document_blocks"]:
             # SEC sometimes returns an HTML/rate-limit page with status 200; treat as bad fetch
-            head = strip_html(filing_txt[:600])
+            with filing_cache.open_text(entry) as f:
+                head = strip_html(f.read(600))
             notes = ("bad_fetch_no_document_blocks: " + head[:180]).strip()
             events.append({
                 "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
@@ -185,51 +198,183 @@ def main():
                 "event_type": "BAD_FETCH", "confidence": 0.0,
                 "snippet": notes, "doc_url": url
             })
-            scanlog.append({
+            return events, {
                 "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
                 "accessionNumber": accession, "doc_url": url,
                 "fetch_ok": 1, "has_document_blocks": 0, "doc_count": 0,
                 "selected_doc_types": "", "notes": notes
+            }
+
+        # stream the filing, keeping only candidate documents
+        parsed = filing_docs.parse_cached(entry)
+
+    doc_count, docs = parsed
+    ranked = sorted([(doc_score(dt), dt, tx) for dt, tx in docs], reverse=True, key=lambda x: x[0])
+    ranked = [x for x in ranked if x[0] > 0][:8]  # scan top 8 docs
+
+    selected_types = ",".join([dt for _, dt, _ in ranked])
+
+    # scan
+    for _, dtype, text in ranked:
+        for etype, m in scan_events(text):
+            snip = snippet(text, m.start(), m.end())
+            base = BASE_CONFIDENCE.get(etype, 0.5)
+            conf = min(0.99, base + (0.05 if dtype.upper().startswith("EX-99") else 0.0))
+            events.append({
+                "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
+                "accessionNumber": accession, "doc_type": dtype,
+                "event_type": etype, "confidence": conf,
+                "snippet": snip[:500], "doc_url": url
             })
+
+    return events, {
+        "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
+        "accessionNumber": accession, "doc_url": url,
+        "fetch_ok": fetch_ok, "has_document_blocks": 1, "doc_count": doc_count,
+        "selected_doc_types": selected_types[:220],
+        "notes": f"hits={len(events)}"
+    }
+
+# -----------------------------
+# SCAN LEDGER
+# -----------------------------
+# Filings never change once published, so a (accession, pattern-set hash) pair only needs
+# scanning once. Only the scan-derived fields are kept; ticker/cik/form/date/url come from
+# the current worklist row. Download errors and bad fetches are not recorded (retried).
+ROW_FIELDS = ["ticker", "cik", "form", "filingDate", "accessionNumber", "doc_url"]
+
+def pattern_set_hash() -> str:
+    spec = {
+        "patterns": [(etype, pat.pattern, pat.flags) for etype, pat in PATTERNS],
+        "base_confidence": BASE_CONFIDENCE,
+        "scan_version": SCAN_VERSION,
+        "parser_version": filing_docs.PARSER_VERSION,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def open_ledger(path: str = LEDGER_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scans (
+            accession TEXT,
+            pattern_hash TEXT,
+            scanned_utc TEXT,
+            log_json TEXT,
+            events_json TEXT,
+            PRIMARY KEY (accession, pattern_hash)
+        )
+        """
+    )
+    return conn
+
+def ledger_lookup(conn, accessions, phash: str) -> dict:
+    """accession -> (log fields, [event fields]) for accessions scanned with this pattern set."""
+    out = {}
+    accessions = list(accessions)
+    for i in range(0, len(accessions), 500):
+        batch = accessions[i:i + 500]
+        q = f"SELECT accession, log_json, events_json FROM scans WHERE pattern_hash = ? AND accession IN ({','.join('?' * len(batch))})"
+        for acc, log_json, events_json in conn.execute(q, [phash] + batch):
+            out[acc] = (json.loads(log_json), json.loads(events_json))
+    return out
+
+def ledger_record(conn, results, phash: str) -> int:
+    now = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    rows = {}
+    for ev, log in results:
+        if not log["has_document_blocks"]:
             continue
+        acc = log["accessionNumber"]
+        rows[acc] = (
+            acc, phash, now,
+            json.dumps({k: v for k, v in log.items() if k not in ROW_FIELDS}),
+            json.dumps([{k: v for k, v in e.items() if k not in ROW_FIELDS} for e in ev]),
+        )
+    conn.executemany("INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?)", list(rows.values()))
+    # scans made with older pattern sets can never be reused
+    conn.execute("DELETE FROM scans WHERE pattern_hash != ?", (phash,))
+    conn.commit()
+    return len(rows)
 
-        docs = parse_documents(filing_txt)
-        ranked = sorted([(doc_score(dt), dt, tx) for dt, tx in docs], reverse=True, key=lambda x: x[0])
-        ranked = [x for x in ranked if x[0] > 0][:8]  # scan top 8 docs
-
-        selected_types = ",".join([dt for _, dt, _ in ranked])
-
-        # scan
-        hits_before = len(events)
-        for _, dtype, text in ranked:
-            for etype, pat in PATTERNS:
-                for m in pat.finditer(text):
-                    snip = snippet(text, m.start(), m.end())
-                    base = {
-                        "CRL":0.9,"CLINICAL_HOLD":0.85,"PDUFA":0.8,"FILING_ACCEPTANCE":0.75,
-                        "NDA_BLA_SUBMISSION":0.7,"ADCOM":0.7,"TOPLINE":0.65
-                    }.get(etype, 0.5)
-                    conf = min(0.99, base + (0.05 if dtype.upper().startswith("EX-99") else 0.0))
-                    events.append({
-                        "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
-                        "accessionNumber": accession, "doc_type": dtype,
-                        "event_type": etype, "confidence": conf,
-                        "snippet": snip[:500], "doc_url": url
-                    })
-
-        hit_count = len(events) - hits_before
-        scanlog.append({
-            "ticker": ticker, "cik": cik10, "form": form, "filingDate": fdate,
-            "accessionNumber": accession, "doc_url": url,
-            "fetch_ok": fetch_ok, "has_document_blocks": has_docs, "doc_count": len(docs),
-            "selected_doc_types": selected_types[:220],
-            "notes": f"hits={hit_count}"
-        })
+def from_ledger(job: dict, hit):
+    log_fields, event_fields = hit
+    row = {
+        "ticker": job["ticker"], "cik": job["cik"], "form": job["form"], "filingDate": job["filingDate"],
+        "accessionNumber": job["accessionNumber"], "doc_url": filing_txt_url(job["cik"], job["accessionNumber"]),
+    }
+    return [dict(row, **e) for e in event_fields], dict(row, **log_fields)
+
+def scan_jobs(jobs, workers: int = 1):
+    """Run scan_row over all jobs; results come back in worklist order either way."""
+    if workers <= 1 or len(jobs) < 2:
+        return [scan_row(j) for j in jobs]
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(scan_row, jobs, chunksize=chunksize))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extract regulatory events from worklist filings")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help="processes for parse+scan (default SEC_EXTRACT_WORKERS or 1)")
+    ap.add_argument("--rescan", action="store_true",
+                    help="ignore the scan ledger and re-scan every accession")
+    args = ap.parse_args(argv)
+
+    os.makedirs("out", exist_ok=True)
+
+    event_cols = ["ticker","cik","form","filingDate","accessionNumber","doc_type",
+                  "event_type","confidence","snippet","doc_url"]
+    log_cols = ["ticker","cik","form","filingDate","accessionNumber","doc_url",
+                "fetch_ok","has_document_blocks","doc_count","selected_doc_types","notes"]
+
+    # Always write outputs (even empty)
+    if not os.path.exists(WORKLIST) or os.path.getsize(WORKLIST) == 0:
+        pd.DataFrame(columns=event_cols).to_csv(OUT_EVENTS, index=False)
+        pd.DataFrame(columns=log_cols).to_csv(OUT_LOG, index=False)
+        print(f"{WORKLIST} empty -> wrote empty {OUT_EVENTS} and {OUT_LOG}")
+        return
+
+    wk = pd.read_csv(WORKLIST, dtype=str).fillna("")
+    if wk.empty:
+        pd.DataFrame(columns=event_cols).to_csv(OUT_EVENTS, index=False)
+        pd.DataFrame(columns=log_cols).to_csv(OUT_LOG, index=False)
+        print(f"{WORKLIST} has 0 rows -> wrote empty {OUT_EVENTS} and {OUT_LOG}")
+        return
+
+    jobs = worklist_jobs(wk)
+
+    # Reuse earlier scans of the same accession with the same patterns
+    phash = pattern_set_hash()
+    ledger = open_ledger()
+    known = {} if args.rescan else ledger_lookup(
+        ledger, {j["accessionNumber"] for j in jobs if j["cik"] and j["accessionNumber"]}, phash)
+    reuse = [bool(j["cik"]) and j["accessionNumber"] in known for j in jobs]
+    todo = [j for j, hit in zip(jobs, reuse) if not hit]
+
+    # I/O stage (threads, shared SEC rate limit), then CPU stage (processes)
+    fetch_filings(todo, FETCH_WORKERS)
+    fresh = scan_jobs(todo, args.workers)
+    recorded = ledger_record(ledger, fresh, phash)
+
+    scanned = iter(fresh)
+    results = [from_ledger(j, known[j["accessionNumber"]]) if hit else next(scanned)
+               for j, hit in zip(jobs, reuse)]
+    ledger.close()
+    print(f"Scan ledger: reused {len(jobs) - len(todo)} rows, scanned {len(todo)} (recorded {recorded}, patterns {phash})")
+
+    events = []
+    scanlog = []
+    for ev, log in results:
+        events.extend(ev)
+        scanlog.append(log)
 
     pd.DataFrame(events, columns=event_cols).to_csv(OUT_EVENTS, index=False)
     pd.DataFrame(scanlog, columns=log_cols).to_csv(OUT_LOG, index=False)
     print(f"Wrote {OUT_EVENTS} with {len(events)} rows")
     print(f"Wrote {OUT_LOG} with {len(scanlog)} rows")
+    sec_client.print_metrics()
 
 if __name__ == "__main__":
     main()
@@ -2,20 +2,39 @@
 # v2.1: Same output columns as trend_v2.py, but with:
 # - feed_url fallback for source domain inference
 # - vectorized recency + time windows
+# - column-wise title cleanup, domain/source weights and intent matching (once per distinct value)
 # - no groupby.apply (faster on large mention sets)
+# - incremental: new mentions are folded into the hourly mention cube (mention_cube.py), so a
+#   run scores only what arrived since the last update; window edges fall on whole hours.
+#   --rebuild starts the cube over, --full (or TREND_CUBE=0) rescores the whole window
 #
 # Output: out/trends_v2.csv
 
-import os, re, html
+import os, re, html, time, warnings
+import argparse
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
 import numpy as np
 import pandas as pd
 
+import mentions_store
+import mention_cube
+
 IN_MENTIONS = "out/mentions.csv"
 OUT_TRENDS = "out/trends_v2.csv"
 
+OUT_COLS = [
+    "ticker","trend_score","velocity_6h","accel_6h",
+    "mentions_6h","mentions_prev6h","mentions_24h","mentions_7d",
+    "top_intents_24h","sources_24h","best_source","best_title","best_url"
+]
+
+# 1 = window sums from the hourly mention cube (mention_cube.py), topped up with new mentions;
+# 0 = rescore every mention in the window on every run (also: --full)
+TREND_CUBE = os.getenv("TREND_CUBE", "1").strip() != "0"
+CUBE_WATERMARK_SLACK = 300  # seconds; store files written while an update reads are picked up next time
+
 # ----------------------------
 # Tunables
 # ----------------------------
@@ -126,19 +145,64 @@ def classify_intent(text: str) -> list[str]:
         intents = ["GENERAL"]
     return intents
 
-def main():
-    os.makedirs("out", exist_ok=True)
-
-    df = safe_read_mentions(IN_MENTIONS)
-    if df.empty:
-        pd.DataFrame(columns=[
-            "ticker","trend_score","velocity_6h","accel_6h",
-            "mentions_6h","mentions_prev6h","mentions_24h","mentions_7d",
-            "top_intents_24h","sources_24h","best_source","best_title","best_url"
-        ]).to_csv(OUT_TRENDS, index=False)
-        print(f"{IN_MENTIONS} missing/empty -> wrote empty {OUT_TRENDS}")
-        return
-
+# ----------------------------
+# Column-wise versions of the helpers above (same results). Titles and URLs repeat across
+# tickers and runs, so main() feeds them through per_unique(). Regex columns are cast to
+# object so Python `re` semantics (\b, \s) apply whatever the string backend.
+# ----------------------------
+NETLOC_RE = r"^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?//([^/?#]*)"
+ODD_URL_RE = r"[^\x21-\x7e]|[\[\]]"  # whitespace, non-ASCII, IPv6 brackets: left to urlparse
+
+def strip_html_series(s: pd.Series) -> pd.Series:
+    s = s.fillna("").astype(str).astype(object)
+    amp = s.str.contains("&", regex=False)
+    if amp.any():
+        s = s.copy()
+        s[amp] = s[amp].map(html.unescape)
+    s = s.str.replace(r"<[^>]+>", "", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+def domain_series(urls: pd.Series) -> pd.Series:
+    u = urls.fillna("").astype(str).astype(object)
+    dom = u.str.extract(NETLOC_RE, expand=False).fillna("").str.lower()
+    odd = u.str.contains(ODD_URL_RE, regex=True)
+    if odd.any():
+        dom[odd] = u[odd].map(get_domain)
+    return dom
+
+def domain_weight_series(domain: pd.Series, weights: dict | None = None) -> pd.Series:
+    weights = DOMAIN_WEIGHTS if weights is None else weights
+    w = domain.map(weights)
+    bare = domain.str.slice(4).where(domain.str.startswith("www."))
+    w = w.fillna(bare.map(weights))
+    w = w.mask(domain.str.startswith(("ir.", "investor.")), 1.6)
+    return w.fillna(1.0).astype(float)
+
+def intent_hits(text: pd.Series) -> pd.DataFrame:
+    """One boolean column per INTENT_PATTERNS name (in order), then GENERAL where none matched."""
+    text = text.astype(object)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # "pattern has match groups": only a yes/no is wanted
+        hits = pd.DataFrame({name: text.str.contains(pat) for name, pat in INTENT_PATTERNS}, index=text.index)
+    hits["GENERAL"] = ~hits.any(axis=1)
+    return hits.astype(bool)
+
+def intent_weight(hits: pd.DataFrame, weights: dict | None = None) -> np.ndarray:
+    """Per row: the largest weight among the matched intents."""
+    weights = INTENT_WEIGHTS if weights is None else weights
+    w = np.array([weights.get(c, 1.0) for c in hits.columns], dtype=float)
+    return (hits.to_numpy() * w).max(axis=1, initial=0.0)
+
+def per_unique(s: pd.Series, fn) -> pd.Series | pd.DataFrame:
+    """fn (a column-wise helper above) evaluated once per distinct value of s."""
+    codes, uniq = pd.factorize(s.fillna("").astype(str).astype(object))
+    out = fn(pd.Series(uniq, dtype=object))
+    if isinstance(out, pd.DataFrame):
+        return pd.DataFrame(out.to_numpy()[codes], index=s.index, columns=out.columns)
+    return pd.Series(out.to_numpy()[codes], index=s.index)
+
+def prepare_mentions(df: pd.DataFrame, cutoff_ts: pd.Timestamp) -> pd.DataFrame:
+    """Column fallbacks, title_text, upper-case tickers, ts; rows older than cutoff_ts dropped."""
     if "ticker" not in df.columns:
         raise ValueError("mentions.csv missing ticker column (or headerless mapping failed)")
 
@@ -159,34 +223,78 @@ def main():
     if not title_col:
         df["title_text"] = ""
     else:
-        df["title_text"] = df[title_col].apply(strip_html)
+        df["title_text"] = per_unique(df[title_col], strip_html_series)
 
     df["ticker"] = df["ticker"].astype(str).str.upper().str.strip()
     df = df[df["ticker"] != ""].copy()
 
     # Parse times
     df["ts"] = pd.to_datetime(df["created_at_utc"], errors="coerce", utc=True)
-    now_dt = datetime.now(timezone.utc)
-    now_ts = pd.Timestamp(now_dt)
-
-    cutoff_ts = now_ts - pd.Timedelta(days=LOOKBACK_DAYS)
-    df = df[df["ts"].isna() | df["ts"].ge(cutoff_ts)].copy()
+    return df[df["ts"].isna() | df["ts"].ge(cutoff_ts)].copy()
 
+def add_weights(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds domain, src_w, intent_w; returns the intent_hits frame for df."""
     # ----------------------------
     # Domain + source weights (with feed_url fallback)
     # ----------------------------
     url_s = df["url"].astype(str)
     feed_s = df["feed_url"].astype(str)
     df["url_eff"] = url_s.where(url_s.str.len() > 0, feed_s)   # fallback
-    df["domain"] = df["url_eff"].apply(get_domain)
-    df["src_w"] = df["domain"].apply(domain_weight).astype(float)
+    df["domain"] = per_unique(df["url_eff"], domain_series)
+    df["src_w"] = per_unique(df["domain"], domain_weight_series).astype(float)
 
     # ----------------------------
     # Intent + intent weights
     # ----------------------------
-    df["intents"] = df["title_text"].astype(str).apply(classify_intent)
-    df["intent_w"] = df["intents"].apply(lambda xs: max(INTENT_WEIGHTS.get(x, 1.0) for x in xs)).astype(float)
+    hits = per_unique(df["title_text"], intent_hits)
+    df["intent_w"] = intent_weight(hits)
+    return hits
+
+def top_intents(ex: pd.DataFrame, tickers: pd.Series) -> pd.DataFrame:
+    """ex: one row per (ticker, intent, mention_score) -> ticker, top_intents_24h ("CRL:1.23;...")."""
+    ti = (
+        ex.groupby(["ticker", "intent"], as_index=False)["mention_score"]
+          .sum()
+          .rename(columns={"mention_score": "w"})
+    )
+    ti = ti.sort_values(["ticker", "w"], ascending=[True, False], kind="mergesort")
+    ti["rank"] = ti.groupby("ticker").cumcount() + 1
+    ti = ti[ti["rank"] <= 3].copy()
+    ti["pair"] = ti["intent"].astype(str) + ":" + ti["w"].map(lambda v: f"{v:.2f}")
+
+    top_int = (
+        ti.groupby("ticker", as_index=False)["pair"]
+          .agg(lambda s: ";".join(s.tolist()))
+          .rename(columns={"pair": "top_intents_24h"})
+    )
+    top_int = pd.DataFrame({"ticker": tickers}).merge(top_int, on="ticker", how="left")
+    top_int["top_intents_24h"] = top_int["top_intents_24h"].fillna("")
+    return top_int
+
+def add_trend_score(agg: pd.DataFrame) -> pd.DataFrame:
+    # Ensure mention counts are ints
+    for c in ["mentions_6h", "mentions_prev6h", "mentions_24h", "mentions_7d"]:
+        agg[c] = pd.to_numeric(agg[c], errors="coerce").fillna(0).astype(int)
+
+    # Velocity + acceleration
+    agg["velocity_6h"] = agg["score_6h"] / (agg["score_24h"] + 1e-6)
+    agg["accel_6h"] = agg["score_6h"] - agg["score_prev6h"]
+
+    # Trend score (same formula as v2)
+    base = (2.2 * agg["score_6h"]) + (1.0 * agg["score_24h"]) + (0.3 * agg["score_7d"])
+    boost = (1.0 + 0.6 * agg["velocity_6h"].clip(lower=0, upper=3)) + (0.15 * agg["accel_6h"].clip(lower=0))
+    src_boost = (1.0 + 0.10 * agg["sources_24h"].clip(lower=0, upper=6))
+    agg["trend_score"] = base * boost * src_boost
+    return agg
+
+def finish(out: pd.DataFrame) -> pd.DataFrame:
+    # Final columns (identical order to v2)
+    out = out[OUT_COLS].copy()
+    out["trend_score"] = pd.to_numeric(out["trend_score"], errors="coerce").fillna(0.0)
+    return out.sort_values("trend_score", ascending=False)
 
+def trends_from_mentions(df: pd.DataFrame, hits: pd.DataFrame, now_ts: pd.Timestamp) -> pd.DataFrame:
+    """Score every mention in df (prepare_mentions + add_weights) as of now_ts."""
     # ----------------------------
     # Vectorized recency weighting
     # ----------------------------
@@ -239,19 +347,7 @@ def main():
     agg = agg.merge(src24, on="ticker", how="left")
     agg["sources_24h"] = agg["sources_24h"].fillna(0).astype(int)
 
-    # Ensure mention counts are ints
-    for c in ["mentions_6h", "mentions_prev6h", "mentions_24h", "mentions_7d"]:
-        agg[c] = pd.to_numeric(agg[c], errors="coerce").fillna(0).astype(int)
-
-    # Velocity + acceleration
-    agg["velocity_6h"] = agg["score_6h"] / (agg["score_24h"] + 1e-6)
-    agg["accel_6h"] = agg["score_6h"] - agg["score_prev6h"]
-
-    # Trend score (same formula as v2)
-    base = (2.2 * agg["score_6h"]) + (1.0 * agg["score_24h"]) + (0.3 * agg["score_7d"])
-    boost = (1.0 + 0.6 * agg["velocity_6h"].clip(lower=0, upper=3)) + (0.15 * agg["accel_6h"].clip(lower=0))
-    src_boost = (1.0 + 0.10 * agg["sources_24h"].clip(lower=0, upper=6))
-    agg["trend_score"] = base * boost * src_boost
+    agg = add_trend_score(agg)
 
     # ----------------------------
     # Top intents (24h) WITHOUT groupby.apply
@@ -259,25 +355,14 @@ def main():
     if df_24.empty:
         top_int = pd.DataFrame({"ticker": agg["ticker"], "top_intents_24h": ""})
     else:
-        ex = df_24[["ticker", "intents", "mention_score"]].explode("intents")
-        ex = ex.rename(columns={"intents": "intent"})
-        ti = (
-            ex.groupby(["ticker", "intent"], as_index=False)["mention_score"]
-              .sum()
-              .rename(columns={"mention_score": "w"})
-        )
-        ti = ti.sort_values(["ticker", "w"], ascending=[True, False], kind="mergesort")
-        ti["rank"] = ti.groupby("ticker").cumcount() + 1
-        ti = ti[ti["rank"] <= 3].copy()
-        ti["pair"] = ti["intent"].astype(str) + ":" + ti["w"].map(lambda v: f"{v:.2f}")
-
-        top_int = (
-            ti.groupby("ticker", as_index=False)["pair"]
-              .agg(lambda s: ";".join(s.tolist()))
-              .rename(columns={"pair": "top_intents_24h"})
-        )
-        top_int = agg[["ticker"]].merge(top_int, on="ticker", how="left")
-        top_int["top_intents_24h"] = top_int["top_intents_24h"].fillna("")
+        # one row per (mention, matched intent), in mention order
+        r, c = np.nonzero(hits.loc[df_24.index].to_numpy())
+        ex = pd.DataFrame({
+            "ticker": df_24["ticker"].to_numpy()[r],
+            "intent": hits.columns.to_numpy()[c],
+            "mention_score": df_24["mention_score"].to_numpy()[r],
+        })
+        top_int = top_intents(ex, agg["ticker"])
 
     agg = agg.merge(top_int[["ticker", "top_intents_24h"]], on="ticker", how="left")
 
@@ -307,17 +392,158 @@ def main():
     f = best_df["feed_url"].fillna("").astype(str)
     best_df["best_url"] = u.where(u.str.len() > 0, f)
 
-    out = agg.merge(best_df[["ticker", "best_source", "best_title", "best_url"]], on="ticker", how="left")
+    return agg.merge(best_df[["ticker", "best_source", "best_title", "best_url"]], on="ticker", how="left")
 
-    # Final columns (identical order to v2)
-    out = out[[
-        "ticker","trend_score","velocity_6h","accel_6h",
-        "mentions_6h","mentions_prev6h","mentions_24h","mentions_7d",
-        "top_intents_24h","sources_24h","best_source","best_title","best_url"
-    ]].copy()
+# ----------------------------
+# Cube mode: mentions are scored once and folded into mention_cube.py's hourly buckets (by
+# rss_ingest.py right after it appends them, and by every run here); each update reads only
+# what was added to the mentions store since the last one.
+# ----------------------------
+def cube_params() -> dict:
+    """Everything a bucket's score depends on; a change rebuilds the cube."""
+    return {
+        "half_life_hours": HALF_LIFE_HOURS,
+        "intent_weights": INTENT_WEIGHTS,
+        "domain_weights": DOMAIN_WEIGHTS,
+        "intent_patterns": [[name, pat.pattern] for name, pat in INTENT_PATTERNS],
+    }
+
+def mention_key(df: pd.DataFrame) -> pd.Series:
+    for c in ["mention_id", "id"]:
+        if c in df.columns:
+            return df[c].astype(str)
+    return pd.util.hash_pandas_object(df, index=False).astype(str)
+
+def intent_names(hits: pd.DataFrame) -> pd.Series:
+    """Matched intents per row as one string ("CRL;PDUFA"), in INTENT_PATTERNS order."""
+    bits = hits.to_numpy().astype(np.int64) @ (1 << np.arange(hits.shape[1], dtype=np.int64))
+    codes, uniq = pd.factorize(bits)
+    names = [";".join(c for j, c in enumerate(hits.columns) if m >> j & 1) for m in uniq]
+    return pd.Series(np.array(names, dtype=object)[codes], index=hits.index)
+
+def update_cube(now_ts: pd.Timestamp | None = None, rebuild: bool = False) -> int:
+    """Fold mentions not yet in the cube into it and drop expired hours. Returns mentions added."""
+    if now_ts is None:
+        now_ts = pd.Timestamp(datetime.now(timezone.utc))
+    conn, empty = mention_cube.connect(cube_params(), rebuild=rebuild)
+    try:
+        # whole hours: the cube starts at the beginning of the hour CUBE_DAYS ago
+        first_hour = mention_cube.hour_of(now_ts) - 24 * max(mention_cube.CUBE_DAYS, LOOKBACK_DAYS)
+        start = mention_cube.hour_start(first_hour)
+        watermark = None
+        if mentions_store.days():
+            since = 0.0 if empty else float(mention_cube.get_meta(conn, "store_watermark", "0"))
+            watermark = time.time() - CUBE_WATERMARK_SLACK
+            df = mentions_store.read_changed(since, start=start)
+        else:
+            df = safe_read_mentions(IN_MENTIONS)
+
+        n_new = 0
+        if not df.empty:
+            if "ticker" in df.columns:
+                df["key"] = mention_key(df)
+                df = df[mention_cube.unseen(conn, df["key"], df["ticker"].astype(str).str.upper().str.strip())]
+            df = prepare_mentions(df, start)
+            df = df[df["ts"].notna()].reset_index(drop=True)  # undated mentions have no hour to go in
+            n_new = len(df)
+        if n_new:
+            hits = add_weights(df)
+            u = df["url"].fillna("").astype(str)
+            mention_cube.fold(conn, pd.DataFrame({
+                "key": df["key"],
+                "ticker": df["ticker"],
+                "ts": df["ts"].clip(upper=now_ts),  # future timestamps count from now, as in --full
+                "score": df["src_w"] * df["intent_w"],
+                "intents": intent_names(hits),
+                "domain": df["domain"],
+                "source": df["domain"],
+                "title": df["title_text"].astype(str).str.slice(0, 180),
+                "url": u.where(u.str.len() > 0, df["feed_url"].fillna("").astype(str)),
+            }), HALF_LIFE_HOURS)
+
+        mention_cube.prune(conn, first_hour)
+        if watermark is not None:
+            mention_cube.set_meta(conn, "store_watermark", watermark)
+        conn.commit()
+        print(f"Mention cube: {'rebuilt, ' if empty else ''}{n_new} new mentions folded in")
+        return n_new
+    finally:
+        conn.close()
+
+def trends_from_cube(b: pd.DataFrame, best: pd.DataFrame, now_ts: pd.Timestamp) -> pd.DataFrame:
+    """Same columns as trends_from_mentions, from hourly buckets (window edges on whole hours)."""
+    now_h = mention_cube.hours(pd.Series([now_ts]))[0]
+    b["score"] = b["score"] * np.power(0.5, (now_h - b["hour"]) / HALF_LIFE_HOURS)
+    h6, h12, h24 = (int(np.floor(now_h - h)) for h in (6, 12, 24))
+    in6 = b["hour"].ge(h6)
+    in_prev6 = b["hour"].ge(h12) & ~in6
+    in24 = b["hour"].ge(h24)
+    b = b.assign(
+        mentions_6h=b["mentions"].where(in6, 0), mentions_prev6h=b["mentions"].where(in_prev6, 0),
+        mentions_24h=b["mentions"].where(in24, 0),
+        score_6h=b["score"].where(in6, 0.0), score_prev6h=b["score"].where(in_prev6, 0.0),
+        score_24h=b["score"].where(in24, 0.0),
+    )
+    agg = b.groupby("ticker", as_index=False).agg(
+        mentions_6h=("mentions_6h", "sum"),
+        mentions_prev6h=("mentions_prev6h", "sum"),
+        mentions_24h=("mentions_24h", "sum"),
+        mentions_7d=("mentions", "sum"),
+        score_6h=("score_6h", "sum"),
+        score_prev6h=("score_prev6h", "sum"),
+        score_24h=("score_24h", "sum"),
+        score_7d=("score", "sum"),
+    )
 
-    out["trend_score"] = pd.to_numeric(out["trend_score"], errors="coerce").fillna(0.0)
-    out = out.sort_values("trend_score", ascending=False)
+    b24 = b[in24]
+    src24 = b24.groupby("ticker")["domain"].nunique().rename("sources_24h").reset_index()
+    agg = agg.merge(src24, on="ticker", how="left")
+    agg["sources_24h"] = agg["sources_24h"].fillna(0).astype(int)
+
+    agg = add_trend_score(agg)
+
+    ex = b24[["ticker", "intents", "score"]].assign(intent=b24["intents"].str.split(";"))
+    ex = ex.explode("intent").rename(columns={"score": "mention_score"})
+    agg = agg.merge(top_intents(ex, agg["ticker"]), on="ticker", how="left")
+
+    # best mention of the last 24h, else of the whole window
+    best = best.assign(in24=best["hour"].ge(h24))
+    best = best.sort_values(["ticker", "in24", "best_key"], ascending=[True, False, False], kind="mergesort")
+    best = best.drop_duplicates("ticker").rename(
+        columns={"source": "best_source", "title": "best_title", "url": "best_url"})
+    return agg.merge(best[["ticker", "best_source", "best_title", "best_url"]], on="ticker", how="left")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Trend scores from mentions -> out/trends_v2.csv")
+    ap.add_argument("--rebuild", action="store_true", help="rebuild the mention cube from the mentions store")
+    ap.add_argument("--full", action="store_true", help="rescore every mention in the window (no cube)")
+    args = ap.parse_args(argv)
+
+    os.makedirs("out", exist_ok=True)
+    now_ts = pd.Timestamp(datetime.now(timezone.utc))
+
+    if TREND_CUBE and not args.full:
+        update_cube(now_ts, rebuild=args.rebuild)
+        first_hour = mention_cube.hour_of(now_ts) - 24 * LOOKBACK_DAYS
+        b, best = mention_cube.buckets(first_hour), mention_cube.best(first_hour)
+        out = finish(trends_from_cube(b, best, now_ts)) if not b.empty else pd.DataFrame(columns=OUT_COLS)
+        out.to_csv(OUT_TRENDS, index=False)
+        print(f"Wrote {OUT_TRENDS} with {len(out)} rows")
+        return
+
+    # Only the lookback window is read from the mentions store; the CSV is the fallback
+    if mentions_store.days():
+        df = mentions_store.read_recent(LOOKBACK_DAYS)
+    else:
+        df = safe_read_mentions(IN_MENTIONS)
+    if df.empty:
+        pd.DataFrame(columns=OUT_COLS).to_csv(OUT_TRENDS, index=False)
+        print(f"{IN_MENTIONS} missing/empty -> wrote empty {OUT_TRENDS}")
+        return
+
+    df = prepare_mentions(df, now_ts - pd.Timedelta(days=LOOKBACK_DAYS))
+    hits = add_weights(df)
+    out = finish(trends_from_mentions(df, hits, now_ts))
 
     out.to_csv(OUT_TRENDS, index=False)
     print(f"Wrote {OUT_TRENDS} with {len(out)} rows")